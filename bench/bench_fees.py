@@ -0,0 +1,49 @@
+"""Обратный пересчёт цен itemmoney в числа экрана (strategy.stored_to_screen).
+
+Запуск из корня проекта:
+    python bench/bench_fees.py [максимальная_цена]
+
+Сканер пишет int(buy × BUY_FEE) и int(sale × SALE_FEE). Для всех цен
+экрана от 0 до максимальной проверяет, что закуп восстанавливается точно,
+а продажа — точно или на 1 меньше настоящей, и что повторная запись
+восстановленной продажи даёт то же число в БД.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import numpy as np
+
+from strategy import BUY_FEE, SALE_FEE, stored_to_screen
+
+MAX_PRICE = 10_000_000
+
+
+def main():
+    top = int(sys.argv[1]) if len(sys.argv) > 1 else MAX_PRICE
+    screen = np.arange(top + 1, dtype=np.int64)
+    # та же арифметика, что в Scanner.record: float × комиссия, затем int()
+    stored_buy = (screen * BUY_FEE).astype(np.int64)
+    stored_sale = (screen * SALE_FEE).astype(np.int64)
+
+    started = time.perf_counter()
+    buy, sale = stored_to_screen(stored_buy, stored_sale)
+    elapsed = (time.perf_counter() - started) * 1000
+
+    buy_errors = int((buy != screen).sum())
+    sale_low = int((sale == screen - 1).sum())
+    sale_errors = int(((sale != screen) & (sale != screen - 1)).sum())
+    restored = int(((sale * SALE_FEE).astype(np.int64) != stored_sale).sum())
+    print(f"💱 Цены 0–{top}: пересчёт {elapsed:.1f} мс")
+    print(f"   закуп: ошибок {buy_errors}")
+    print(f"   продажа: на 1 меньше {sale_low} ({sale_low / len(screen):.1%}), ошибок {sale_errors}, "
+          f"не та запись в БД {restored}")
+    assert buy_errors == 0, "закуп восстанавливается неточно"
+    assert sale_errors == 0 and restored == 0, "продажа восстанавливается хуже чем до 1"
+    print("✅ Пересчёт сходится с записью сканера")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Шаблоны глифов против pytesseract: точность и время на поле.
+
+Запуск из корня проекта:
+    python bench/bench_glyphs.py [папка_с_вырезками] [повторов]
+
+Шаблоны строятся по предметам с чётными номерами, проверка — на нечётных,
+чтобы не проверять распознавание на тех же вырезках, из которых сделаны шаблоны.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from ocr import (
+    FIELD_KINDS, FIELD_PARSE, PROFILES, GlyphRecognizer, PytesseractEngine,
+    binarize, load_labeled_crops, preprocess,
+)
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "ocr")
+
+
+def bench_glyphs(recognizer, crops, repeats):
+    correct = confident = 0
+    started = time.perf_counter()
+    for _ in range(repeats):
+        for region_name, value, _, crop in crops:
+            kind = FIELD_KINDS[region_name]
+            text, confidences = recognizer.recognize(binarize(crop, kind))
+            confident += recognizer.is_confident(confidences)
+            try:
+                correct += FIELD_PARSE[kind](text, region_name) == value
+            except ValueError:
+                pass
+    total = len(crops) * repeats
+    return (time.perf_counter() - started) * 1000 / total, correct / total, confident / total
+
+
+def bench_tesseract(engine, crops, repeats):
+    correct = 0
+    started = time.perf_counter()
+    for _ in range(repeats):
+        for region_name, value, _, crop in crops:
+            kind = FIELD_KINDS[region_name]
+            text = engine.read([preprocess(crop, PROFILES[kind])])[0]
+            try:
+                correct += FIELD_PARSE[kind](text, region_name) == value
+            except ValueError:
+                pass
+    total = len(crops) * repeats
+    return (time.perf_counter() - started) * 1000 / total, correct / total
+
+
+def main():
+    folder = sys.argv[1] if len(sys.argv) > 1 else FIXTURES_DIR
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    crops = load_labeled_crops(folder)
+    train = [c for c in crops if int(c[2]) % 2 == 0]
+    test = [c for c in crops if int(c[2]) % 2 == 1]
+    recognizer = GlyphRecognizer.from_samples(
+        [(binarize(crop, FIELD_KINDS[region_name]), str(value)) for region_name, value, _, crop in train]
+    )
+    print(f"Шаблонов: {len(recognizer.labels)}, полей для проверки: {len(test)}")
+
+    ms, accuracy, confident = bench_glyphs(recognizer, test, repeats)
+    print(f"  {'glyphs':<12} {ms:8.3f} мс/поле   точность {accuracy:.1%}   уверенно {confident:.1%}")
+    try:
+        engine = PytesseractEngine()
+        ms, accuracy = bench_tesseract(engine, test, 1)
+        print(f"  {'pytesseract':<12} {ms:8.3f} мс/поле   точность {accuracy:.1%}")
+    except Exception as e:
+        print(f"  {'pytesseract':<12} недоступен: {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""IconLocator против pyscreeze.locate (то, что делает pyautogui.locateOnScreen),
+а также поиск всех иконок одним проходом (locate_many).
+
+Запуск из корня проекта:
+    python bench/bench_locator.py [снимок_экрана.png x,y,w,h иконка.png ...]
+
+Без аргументов собирает синтетический снимок 1920×1080 со списком
+результатов из иконок pic/ и ищет каждую из них.
+"""
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import numpy as np
+from PIL import Image
+
+from capture import FileFrameSource
+from locator import IconLocator
+from regions import RegionMap
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+PIC_DIR = os.path.join(ROOT, "pic")
+LIST_RECT = (600, 330, 700, 600)
+
+
+def synthetic_scene(icons, seed=3):
+    """Снимок с иконками в столбик внутри LIST_RECT. Возвращает (путь, {иконка: (x, y)})."""
+    rng = np.random.default_rng(seed)
+    base = rng.integers(20, 60, size=(1080, 1920, 3), dtype=np.uint8)
+    img = Image.fromarray(base)
+    positions = {}
+    x, y = LIST_RECT[0] + 20, LIST_RECT[1] + 10
+    for path in icons:
+        with Image.open(path) as icon:
+            img.paste(icon.convert('RGB'), (x, y))
+            positions[path] = (x, y)
+            y += icon.height + 12
+    out = os.path.join(tempfile.gettempdir(), "bench_locator_scene.png")
+    img.save(out)
+    return out, positions
+
+
+def timed(fn, repeats=1):
+    started = time.perf_counter()
+    for _ in range(repeats):
+        result = fn()
+    return (time.perf_counter() - started) * 1000 / repeats, result
+
+
+def main():
+    if len(sys.argv) >= 4:
+        scene = sys.argv[1]
+        rect = tuple(int(v) for v in sys.argv[2].split(','))
+        icons = sys.argv[3:]
+        expected = {}
+    else:
+        names = sorted(os.listdir(PIC_DIR))
+        icons = [os.path.join(PIC_DIR, name) for name in names if name.startswith("Кирка")]
+        random.Random(1).shuffle(icons)
+        scene, expected = synthetic_scene(icons)
+        rect = LIST_RECT
+
+    config = os.path.join(tempfile.gettempdir(), "bench_locator_config.json")
+    with open(config, 'w', encoding='utf-8') as f:
+        json.dump({'L': dict(zip(('x', 'y', 'width', 'height'), rect))}, f)
+    regions = RegionMap(config)
+    frame = FileFrameSource(scene, regions).grab()
+    locator = IconLocator(regions)
+
+    try:
+        import pyscreeze
+        haystack = Image.open(scene).convert('RGB')
+    except ImportError:
+        pyscreeze = None
+
+    totals = {'pyscreeze': 0.0, 'cold': 0.0, 'warm': 0.0}
+    correct = 0
+    for path in icons:
+        name = os.path.basename(path)
+        locator.last_hits.pop(path, None)
+        cold_ms, box = timed(lambda: locator.locate(frame, path))
+        warm_ms, _ = timed(lambda: locator.locate(frame, path), 5)
+        totals['cold'] += cold_ms
+        totals['warm'] += warm_ms
+        ok = box is not None and (not expected or (box.left, box.top) == expected[path])
+        correct += ok
+        line = f"  {name:<28} cold {cold_ms:7.1f} мс   warm {warm_ms:6.2f} мс   {'✅' if ok else '❌'} {box}"
+        if pyscreeze:
+            ref_ms, _ = timed(lambda: pyscreeze.locate(path, haystack, confidence=0.85))
+            totals['pyscreeze'] += ref_ms
+            line += f"   pyscreeze {ref_ms:7.1f} мс"
+        print(line)
+
+    n = len(icons)
+    print(f"Найдено верно: {correct}/{n}")
+    print(f"Среднее: IconLocator cold {totals['cold'] / n:.1f} мс, warm {totals['warm'] / n:.2f} мс", end="")
+    print(f", pyscreeze {totals['pyscreeze'] / n:.1f} мс" if pyscreeze else "")
+
+    # все иконки за один проход по кадру
+    locator.last_hits.clear()
+    batch_ms, boxes = timed(lambda: locator.locate_many(frame, icons))
+    batch_ok = sum(
+        box is not None and (not expected or (box.left, box.top) == expected[path])
+        for path, box in boxes.items()
+    )
+    print(f"locate_many: {n} иконок за {batch_ms:.1f} мс (по одной: {totals['cold']:.1f} мс), верно {batch_ok}/{n}")
+
+
+if __name__ == "__main__":
+    main()
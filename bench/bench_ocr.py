@@ -0,0 +1,74 @@
+"""Время OCR на предмет (4 поля) для разных движков.
+
+Запуск из корня проекта:
+    python bench/bench_ocr.py [папка_с_вырезками] [повторов]
+
+Имена файлов вырезок: {область}_{число}_{номер}.png — номер объединяет
+четыре поля одного предмета.
+"""
+import os
+import sys
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from PIL import Image
+
+from ocr import (
+    BatchPytesseractEngine, PytesseractEngine, TesserocrEngine,
+    parse_price, parse_volume, prepare_price, prepare_volume,
+)
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "ocr")
+FIELDS = {'D': (prepare_price, parse_price), 'D1': (prepare_price, parse_price),
+          'E': (prepare_volume, parse_volume), 'C': (prepare_volume, parse_volume)}
+
+
+def load_items(folder):
+    """{номер: [(область, ожидаемое число, картинка)]}"""
+    items = defaultdict(list)
+    for name in sorted(os.listdir(folder)):
+        if not name.endswith('.png'):
+            continue
+        region_name, value, index = name[:-4].split('_')
+        with Image.open(os.path.join(folder, name)) as img:
+            items[index].append((region_name, int(value), img.convert('RGB')))
+    return list(items.values())
+
+
+def run(engine, items, repeats):
+    correct = total = 0
+    started = time.perf_counter()
+    for _ in range(repeats):
+        for fields in items:
+            crops = [FIELDS[region_name][0](img) for region_name, _, img in fields]
+            texts = engine.read(crops)
+            for (region_name, expected, _), text in zip(fields, texts):
+                total += 1
+                try:
+                    correct += FIELDS[region_name][1](text, region_name) == expected
+                except ValueError:
+                    pass
+    elapsed = time.perf_counter() - started
+    return elapsed * 1000 / (len(items) * repeats), correct / max(1, total)
+
+
+def main():
+    folder = sys.argv[1] if len(sys.argv) > 1 else FIXTURES_DIR
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 3
+    items = load_items(folder)
+    print(f"Предметов: {len(items)}, повторов: {repeats}")
+    for engine_cls in (PytesseractEngine, BatchPytesseractEngine, TesserocrEngine):
+        try:
+            engine = engine_cls()
+        except Exception as e:
+            print(f"  {engine_cls.name:<20} недоступен: {e}")
+            continue
+        ms, accuracy = run(engine, items, repeats)
+        engine.close()
+        print(f"  {engine.name:<20} {ms:8.1f} мс/предмет   точность {accuracy:.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""Несколько клиентов игры одновременно на имитации: ParallelScan без экрана и мыши.
+
+Запуск из корня проекта:
+    python bench/bench_parallel.py [число_клиентов]
+
+Каждый клиент — своя имитация окна рынка (FakeGame из bench_replay) со своей
+разметкой (окна сдвинуты); ввод идёт под общим замком, как с одной мышью.
+Печатает время одного клиента и N клиентов и проверяет, что каждый предмет
+обработан ровно один раз, а числа и ордера совпадают с одиночным прогоном.
+Правило ордера — пропускающее всё (числа вырезок правило по умолчанию не
+проходят), чтобы ордера выставлялись и ввод F/G/H шёл под общим замком.
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from bench_replay import FIXTURES_DIR, FakeGame, make_reader, synthetic_items, write_layout
+from locator import IconLocator
+from ocr import load_labeled_crops
+from replay import ListWriter
+from scanner import Scanner
+from strategy import BuyStrategy
+from workers import ParallelScan, ScanClient
+
+CLIENT_SHIFT = 120   # окна клиентов сдвинуты; до 4 клиентов помещаются в экран имитации
+# Клиент отвечает не мгновенно: окно и подсказки дорисовываются с задержкой
+LATENCY = 0.03
+# Ордер по каждому предмету: прибыль и объём не ограничены
+ORDER_ALL = BuyStrategy(min_ratio=0, max_ratio=float('inf'), min_sold=-1, name="bench")
+
+
+class SlowGame(FakeGame):
+    """FakeGame, у которой каждое действие занимает время, как у настоящего клиента."""
+
+    def click(self, x, y):
+        time.sleep(LATENCY)
+        super().click(x, y)
+
+    def move(self, x, y):
+        time.sleep(LATENCY)
+        super().move(x, y)
+
+
+def make_clients(folder, count, items, crops):
+    clients, games = [], []
+    for k in range(count):
+        regions = write_layout(os.path.join(folder, f"client{k}.json"), dx=k * CLIENT_SHIFT)
+        game = SlowGame(regions, items, crops)
+        games.append(game)
+        clients.append(ScanClient(f"client{k}", regions, game, game, IconLocator(regions)))
+    return clients, games
+
+
+def run(count, folder, items, crops):
+    clients, games = make_clients(folder, count, items, crops)
+    writer = ListWriter()
+    started = time.perf_counter()
+    if count == 1:
+        client = clients[0]
+        scanner = Scanner(items, client.regions, client.frames, client.locator, make_reader(crops), writer,
+                          input_backend=client.input_backend, strategy=ORDER_ALL)
+        results = scanner.run()
+    else:
+        results = ParallelScan(clients, items, make_reader(crops), writer, strategy=ORDER_ALL).run()
+    return results, sum(game.orders for game in games), time.perf_counter() - started
+
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 2
+    items = synthetic_items()
+    crops = load_labeled_crops(FIXTURES_DIR)
+    with tempfile.TemporaryDirectory() as folder:
+        single, single_orders, single_time = run(1, folder, items, crops)
+        parallel, parallel_orders, parallel_time = run(count, folder, items, crops)
+
+    print()
+    print(f"🖥 1 клиент: {single_time:.2f} с, {len(single)} предм., ордеров {single_orders}")
+    print(f"🖥 {count} клиента: {parallel_time:.2f} с, {len(parallel)} предм., ордеров {parallel_orders}"
+          f" (x{single_time / parallel_time:.2f})")
+    ids = [result[0] for result in parallel]
+    assert len(ids) == len(set(ids)), "предмет обработан дважды"
+    assert sorted(single) == sorted(parallel), "числа разошлись с одиночным прогоном"
+    assert single_orders > 0, "ни одного ордера — ввод под общим замком не проверен"
+    assert single_orders == parallel_orders, "ордера разошлись с одиночным прогоном"
+    print("✅ Каждый предмет обработан один раз, числа и ордера совпадают")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""Подготовка вырезок: старая цепочка с лямбдами против PreprocessProfile.
+
+Запуск из корня проекта:
+    python bench/bench_preprocess.py [папка_с_вырезками] [повторов]
+
+Для каждого фильтра увеличения печатает время на вырезку, долю пикселей,
+совпавших со старой цепочкой (LANCZOS), и точность tesseract, если он установлен.
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import numpy as np
+from PIL import Image
+
+from ocr import (
+    FIELD_KINDS, FIELD_PARSE, PROFILES, PreprocessProfile, PytesseractEngine,
+    load_labeled_crops, preprocess,
+)
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "ocr")
+FILTERS = ('LANCZOS', 'BICUBIC', 'BILINEAR', 'NEAREST')
+
+
+def legacy(img, kind):
+    """Цепочка, как она была в ocr_d_or_d1 / ocr_e / ocr_c."""
+    img = img.convert('L')
+    if kind == 'price':
+        img = img.resize((img.width * 2, img.height * 2), Image.Resampling.LANCZOS)
+        return img.point(lambda p: p > 128 and 255)
+    img = Image.eval(img, lambda x: 255 - x)
+    img = img.resize((img.width * 4, img.height * 4), Image.Resampling.LANCZOS)
+    return img.point(lambda p: p > 180 and 255)
+
+
+def timed(fn, crops, repeats):
+    started = time.perf_counter()
+    for _ in range(repeats):
+        for region_name, _, _, img in crops:
+            fn(img, FIELD_KINDS[region_name])
+    return (time.perf_counter() - started) * 1000 / (len(crops) * repeats)
+
+
+def ocr_accuracy(engine, fn, crops):
+    correct = 0
+    for region_name, value, _, img in crops:
+        kind = FIELD_KINDS[region_name]
+        text = engine.read([fn(img, kind)])[0]
+        try:
+            correct += FIELD_PARSE[kind](text, region_name) == value
+        except ValueError:
+            pass
+    return correct / len(crops)
+
+
+def main():
+    folder = sys.argv[1] if len(sys.argv) > 1 else FIXTURES_DIR
+    repeats = int(sys.argv[2]) if len(sys.argv) > 2 else 50
+    crops = [(r, v, i, Image.fromarray(a)) for r, v, i, a in load_labeled_crops(folder)]
+    try:
+        engine = PytesseractEngine()
+        engine.read([Image.new('L', (8, 8), 255)])
+    except Exception as e:
+        print(f"ℹ️ tesseract недоступен ({e}) — точность OCR не проверяется")
+        engine = None
+
+    references = [np.asarray(legacy(img, FIELD_KINDS[r])) for r, _, _, img in crops]
+    line = f"  {'legacy':<10} {timed(legacy, crops, repeats):7.3f} мс   совпадение 100.00%"
+    if engine:
+        line += f"   OCR {ocr_accuracy(engine, legacy, crops):.1%}"
+    print(line)
+
+    for name in FILTERS:
+        resample = getattr(Image.Resampling, name)
+        profiles = {
+            kind: PreprocessProfile(p.invert, p.scale, p.threshold, resample)
+            for kind, p in PROFILES.items()
+        }
+
+        def run(img, kind):
+            return preprocess(img, profiles[kind])
+
+        agreement = np.mean([
+            (np.asarray(run(img, FIELD_KINDS[r])) == ref).mean()
+            for (r, _, _, img), ref in zip(crops, references)
+        ])
+        line = f"  {name:<10} {timed(run, crops, repeats):7.3f} мс   совпадение {agreement:.2%}"
+        if resample == PROFILES['price'].resample:
+            line += "   (текущий)"
+        if engine:
+            line += f"   OCR {ocr_accuracy(engine, run, crops):.1%}"
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
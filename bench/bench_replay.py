@@ -0,0 +1,194 @@
+"""Воспроизведение записи прогона без игры: время по этапам, на предмет и сверка OCR.
+
+Запуск из корня проекта:
+    python bench/bench_replay.py [папка_записи]
+
+Папку записи создаёт бот при RECORD_RUNS = True (recordings/ГГГГММДД_ЧЧММСС).
+Без аргументов сначала записывает прогон на имитации игры: иконки pic/,
+числа — вырезки bench/fixtures/ocr, — и затем воспроизводит его.
+"""
+import json
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+import numpy as np
+from PIL import Image
+
+from capture import Frame
+from catalog import CatalogItem
+from locator import IconLocator
+from ocr import FIELD_KINDS, FieldReader, GlyphRecognizer, binarize, load_labeled_crops
+from regions import RegionMap
+from replay import ListWriter, ScanRecorder, replay
+from scanner import Scanner
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+PIC_DIR = os.path.join(ROOT, "pic")
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "ocr")
+
+LAYOUT = {
+    'A': (300, 200, 400, 40),
+    'B': (0, 0, 140, 10),
+    'C': (1000, 500, 180, 26),
+    'D': (1000, 300, 83, 31),
+    'D1': (1000, 340, 96, 31),
+    'E': (1200, 500, 180, 26),
+    'F': (1000, 700, 120, 30),
+    'G': (1000, 740, 120, 30),
+    'H': (1000, 800, 160, 40),
+    'J': (1400, 250, 30, 30),
+    'K': (1100, 560, 300, 80),
+    'L': (300, 260, 400, 700),
+}
+BAR_PITCH = 20
+BAR_WIDTH = 10
+BAR_DAYS = 12
+BACKGROUND = 35
+
+
+class FakeGame:
+    """Имитация окна рынка: экран в памяти, меняется от кликов, наведения и ввода."""
+
+    def __init__(self, regions, items, crops):
+        self.regions = regions
+        self.items = items
+        self.values = {}
+        self.tooltips = {}
+        self.screen = np.full((1080, 1920, 3), BACKGROUND, dtype=np.uint8)
+        self.icons = []
+        self.opened = None
+        self.orders = 0
+        by_region = {}
+        for region_name, value, _, crop in crops:
+            by_region.setdefault(region_name, []).append((value, crop))
+        for k, item in enumerate(items):
+            self.values[item.id] = {r: by_region[r][k % len(by_region[r])] for r in ('D', 'D1', 'E', 'C')}
+
+    def _fill(self, region_name, array=None):
+        x, y, w, h = self.regions.rect(region_name)
+        self.screen[y:y + h, x:x + w] = BACKGROUND
+        if array is not None:
+            self.screen[y:y + array.shape[0], x:x + array.shape[1]] = array[:h, :w]
+
+    def _draw_chart(self, values):
+        x0, y0, w, h = self.regions.rect('K')
+        lastday, last2day = values['E'][0], values['C'][0]
+        days = [lastday, last2day] + [(lastday * (k + 3) * 7) % 5000 for k in range(BAR_DAYS - 2)]
+        top = max(days) or 1
+        newest = self.regions.bottom_right('E')[0]
+        for day, volume in enumerate(days):
+            height = int(round(volume / top * (h - 10)))
+            cx = newest - day * BAR_PITCH
+            if height:
+                self.screen[y0 + h - height:y0 + h, cx - BAR_WIDTH // 2:cx + BAR_WIDTH // 2] = (90, 160, 220)
+
+    # ---------- ввод ----------
+    def click(self, x, y):
+        if self.opened is not None:
+            if (x, y) == self.regions.center('J'):
+                self.opened = None
+                for region_name in ('D', 'D1', 'E', 'C', 'K'):
+                    self._fill(region_name)
+            elif (x, y) == self.regions.center('H'):
+                self.orders += 1
+            return
+        offset = self.regions.rect('B')[2]
+        for item, (ix, iy, w, h) in self.icons:
+            if (x, y) == (ix + w // 2 + offset, iy + h // 2):
+                self.opened = item
+                values = self.values[item.id]
+                self._fill('D', values['D'][1])
+                self._fill('D1', values['D1'][1])
+                self._draw_chart(values)
+                return
+
+    def move(self, x, y):
+        if self.opened is None:
+            return
+        for region_name in ('E', 'C'):
+            hovered = (x, y) == self.regions.bottom_right(region_name)
+            self._fill(region_name, self.values[self.opened.id][region_name][1] if hovered else None)
+
+    def enter(self, field, text):
+        if field != 'A':
+            return
+        self._fill('L')
+        lx, ly, _, _ = self.regions.rect('L')
+        self.icons = []
+        for item in self.items:
+            if item.namebot != text:
+                continue
+            with Image.open(item.image_path) as img:
+                icon = np.asarray(img.convert('RGB'))
+            x, y = lx + 20, ly + 10 + len(self.icons) * 90
+            self.screen[y:y + icon.shape[0], x:x + icon.shape[1]] = icon
+            self.icons.append((item, (x, y, icon.shape[1], icon.shape[0])))
+
+    # ---------- экран ----------
+    def grab(self, region_names=None, rect=None):
+        if rect is None:
+            rects = [self.regions.rect(name) for name in region_names] if region_names else [(0, 0, 1920, 1080)]
+            x0, y0 = min(r[0] for r in rects), min(r[1] for r in rects)
+            x1 = max(r[0] + r[2] for r in rects)
+            y1 = max(r[1] + r[3] for r in rects)
+            rect = (x0, y0, x1 - x0, y1 - y0)
+        x, y, w, h = rect
+        return Frame(self.screen[y:y + h, x:x + w].copy(), origin=(x, y), regions=self.regions)
+
+
+def make_reader(crops):
+    samples = [(binarize(crop, FIELD_KINDS[r]), str(value)) for r, value, _, crop in crops]
+    return FieldReader(None, GlyphRecognizer.from_samples(samples))
+
+
+def write_layout(path, layout=LAYOUT, dx=0, dy=0):
+    """Разметка в файл (со сдвигом — как второе окно клиента); возвращает RegionMap."""
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump({n: {'x': x + dx, 'y': y + dy, 'width': w, 'height': h} for n, (x, y, w, h) in layout.items()}, f)
+    return RegionMap(path)
+
+
+def synthetic_items():
+    """Предметы по иконкам pic/: запрос — имя без номера тира."""
+    items = []
+    for k, name in enumerate(sorted(os.listdir(PIC_DIR))):
+        title = name[:-4]
+        namebot = title.rsplit(' ', 1)[0].lower()
+        items.append(CatalogItem(k + 1, title, namebot, os.path.join(PIC_DIR, name), True))
+    return items
+
+
+def record_synthetic(folder):
+    """Записывает прогон по имитации игры в folder."""
+    regions = write_layout(os.path.join(folder, "layout.json"))
+    items = synthetic_items()
+    crops = load_labeled_crops(FIXTURES_DIR)
+    game = FakeGame(regions, items, crops)
+    settings = {'lookahead': 8, 'pipeline_workers': 0, 'history_days': 2}
+    recording = os.path.join(folder, "recording")
+    recorder = ScanRecorder(recording, regions, items, settings)
+    scanner = Scanner(
+        items, regions, recorder.frames(game), IconLocator(regions), make_reader(crops), ListWriter(),
+        input_backend=recorder.inputs(game), on_values=recorder.on_values, **settings
+    )
+    scanner.run()
+    recorder.close()
+    return recording, make_reader(crops)
+
+
+def main():
+    if len(sys.argv) > 1:
+        replay(sys.argv[1])
+        return
+    with tempfile.TemporaryDirectory() as folder:
+        print("📼 Запись прогона на имитации игры...")
+        recording, reader = record_synthetic(folder)
+        print()
+        replay(recording, reader=reader)
+
+
+if __name__ == "__main__":
+    main()
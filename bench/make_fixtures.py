@@ -0,0 +1,62 @@
+"""Генерирует синтетический набор вырезок для бенчмарков OCR.
+
+Вырезки повторяют размеры областей D/D1/C/E из config.json и цвета игры
+(светлые цифры на тёмной полоске цены, тёмные цифры на светлой подсказке).
+Реальные снимки из игры можно класть в ту же папку с тем же форматом имени:
+{область}_{число}_{номер}.png
+"""
+import os
+import random
+
+from PIL import Image, ImageDraw, ImageFont
+
+FIXTURES_DIR = os.path.join(os.path.dirname(__file__), "fixtures", "ocr")
+
+SIZES = {'D': (83, 31), 'D1': (96, 31), 'E': (180, 26), 'C': (180, 26)}
+PRICE_COLORS = ((46, 38, 30), (226, 218, 196))
+VOLUME_COLORS = ((232, 222, 200), (34, 28, 22))
+
+
+def render(region_name, value, rng):
+    w, h = SIZES[region_name]
+    if region_name in ('D', 'D1'):
+        bg, fg = PRICE_COLORS
+        text = f"{value:,}"
+    else:
+        bg, fg = VOLUME_COLORS
+        text = str(value)
+    img = Image.new('RGB', (w, h), bg)
+    draw = ImageDraw.Draw(img)
+    font = ImageFont.load_default(size=18)
+    left, top, right, bottom = draw.textbbox((0, 0), text, font=font)
+    x = w - (right - left) - 6
+    y = (h - (bottom - top)) // 2 - top
+    draw.text((x, y), text, fill=fg, font=font)
+    # лёгкий шум, как на реальном снимке
+    px = img.load()
+    for _ in range(w * h // 40):
+        i, j = rng.randrange(w), rng.randrange(h)
+        r, g, b = px[i, j]
+        d = rng.randint(-12, 12)
+        px[i, j] = (max(0, min(255, r + d)), max(0, min(255, g + d)), max(0, min(255, b + d)))
+    return img
+
+
+def main(items=12, seed=7):
+    rng = random.Random(seed)
+    os.makedirs(FIXTURES_DIR, exist_ok=True)
+    for n in range(items):
+        values = {
+            'D': rng.randint(100, 250000),
+            'D1': rng.randint(100, 250000),
+            'E': rng.randint(0, 5000),
+            'C': rng.randint(0, 5000),
+        }
+        for region_name, value in values.items():
+            path = os.path.join(FIXTURES_DIR, f"{region_name}_{value}_{n:02d}.png")
+            render(region_name, value, rng).save(path)
+    print(f"✅ Вырезки сохранены в {FIXTURES_DIR}")
+
+
+if __name__ == "__main__":
+    main()
@@ -2,175 +2,120 @@ import sys
 import json
 import os
 import time
-import re
 import keyboard
-import psycopg2
-from psycopg2.extras import RealDictCursor
+import numpy as np
 
 from PyQt6.QtWidgets import (
     QApplication, QWidget, QVBoxLayout, QPushButton, QLabel, QFrame, QHBoxLayout,
-    QListWidget, QListWidgetItem, QCheckBox, QDialog
+    QListView, QLineEdit, QCheckBox, QDialog, QTableView, QHeaderView,
+    QComboBox, QSpinBox, QMessageBox
+)
+from PyQt6.QtCore import (
+    Qt, QRect, QPoint, QObject, QThread, pyqtSignal,
+    QAbstractListModel, QAbstractTableModel, QModelIndex, QSortFilterProxyModel, QTimer
 )
-from PyQt6.QtCore import Qt, QRect, QPoint, QThread, pyqtSignal, QTimer
 from PyQt6.QtGui import QFont, QPainter, QColor, QPen
 
+from regions import (
+    CONFIG_FILE, DEFAULT_PROFILE, OPTIONAL_REGIONS, PROFILES_DIR, REGION_NAMES, RegionMap, list_profiles, profile_path
+)
+from storage import ItemMoneyWriter
+from catalog import ItemCatalog
+
 # ======================
 # Импорты
 # ======================
 try:
-    import pyautogui
-    import pydirectinput
-    import pytesseract
-    from PIL import Image
+    from capture import ScreenFrameSource
+    from ocr import create_field_reader
+    from locator import IconLocator
+    from inputs import BatchedInput, ClipboardInput, FieldInput
+    from waits import ScreenWaiter
+    from replay import ScanRecorder, new_recording_folder
+    from telemetry import RunStats, format_eta, new_stats_path
+    from planner import ScanPlanner
+    from strategy import BuyStrategy
+    from scanner import PAUSED, RUNNING, STOPPING, ScanControl, Scanner
+    from journal import ScanJournal, interrupted_run, remaining_ids
+    from workers import ParallelScan, ScanClient
 except ImportError as e:
-    print(f"❌ Отсутствует зависимость: {e}. Установите: pip install PyQt6 pyautogui pydirectinput pytesseract pillow keyboard psycopg2-binary")
+    print(f"❌ Отсутствует зависимость: {e}. Установите: pip install PyQt6 pyautogui pydirectinput pytesseract pillow numpy keyboard psycopg2-binary")
     sys.exit(1)
 
 # Укажите путь к tesseract, если он не в PATH (только для Windows)
-# pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
-
-# ======================
-# Константы
-# ======================
-CONFIG_FILE = "config.json"
-DB_CONFIG = {
-    'host': 'localhost',
-    'database': 'your_db_name',
-    'user': 'your_user',
-    'password': 'your_password',
-    'port': 5432
-}
-
-# ======================
-# PostgreSQL: чтение и запись
-# ======================
-
-def get_db_connection():
-    return psycopg2.connect(**DB_CONFIG)
-
-def read_items_from_db():
-    """Возвращает список: [(id, name, namebot)]"""
-    with get_db_connection() as conn:
-        with conn.cursor(cursor_factory=RealDictCursor) as cur:
-            cur.execute("SELECT id, name, namebot FROM items ORDER BY id")
-            return [(row['id'], row['name'], row['namebot']) for row in cur.fetchall()]
-
-def write_itemmoney(item_id, buy=None, sale=None, lastday=None, last2day=None):
-    with get_db_connection() as conn:
-        with conn.cursor() as cur:
-            cur.execute("SELECT 1 FROM itemmoney WHERE item_id = %s", (item_id,))
-            exists = cur.fetchone()
-            if exists:
-                fields = []
-                values = []
-                if buy is not None:
-                    fields.append("buy = %s")
-                    values.append(buy)
-                if sale is not None:
-                    fields.append("sale = %s")
-                    values.append(sale)
-                if lastday is not None:
-                    fields.append("lastday = %s")
-                    values.append(lastday)
-                if last2day is not None:
-                    fields.append("last2day = %s")
-                    values.append(last2day)
-                if fields:
-                    values.append(item_id)
-                    query = f"UPDATE itemmoney SET {', '.join(fields)} WHERE item_id = %s"
-                    cur.execute(query, values)
-            else:
-                cur.execute(
-                    "INSERT INTO itemmoney (item_id, buy, sale, lastday, last2day) VALUES (%s, %s, %s, %s, %s)",
-                    (item_id, buy, sale, lastday, last2day)
-                )
-            conn.commit()
+# import pytesseract; pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
 
 # ======================
 # Вспомогательные функции (OCR и UI)
 # ======================
-def get_region_rect(region_name):
-    if not os.path.exists(CONFIG_FILE):
-        raise FileNotFoundError(f"Файл конфигурации {CONFIG_FILE} не найден.")
-    with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
-        config = json.load(f)
-    if region_name not in config:
-        raise ValueError(f"Область '{region_name}' не найдена.")
-    r = config[region_name]
-    return (r['x'], r['y'], r['width'], r['height'])
-
-def get_center_of_region(region_name):
-    x, y, w, h = get_region_rect(region_name)
-    return x + w // 2, y + h // 2
-
-def click_and_type(region_name, text):
-    x, y = get_center_of_region(region_name)
-    pyautogui.click(x, y)
-    time.sleep(0.02)
-    pyautogui.hotkey('ctrl', 'a')
-    time.sleep(0.02)
-    pyautogui.press('backspace')
-    time.sleep(0.02)
-    for char in text:
-        pydirectinput.press(char)
-    time.sleep(0.02)
-
-def click_center(region_name):
-    x, y = get_center_of_region(region_name)
-    pyautogui.click(x, y)
-    time.sleep(0.05)
-
-def move_to_bottom_right_of(region_name):
-    x, y, w, h = get_region_rect(region_name)
-    pyautogui.moveTo(x + w - 1, y + h - 1)
-    time.sleep(0.05)
-
-def ocr_d_or_d1(region_name):
-    x, y, w, h = get_region_rect(region_name)
-    screenshot = pyautogui.screenshot(region=(x, y, w, h))
-    img = screenshot.convert('L')
-    img = img.resize((img.width * 2, img.height * 2), Image.Resampling.LANCZOS)
-    img = img.point(lambda p: p > 128 and 255)
-    text = pytesseract.image_to_string(
-        img,
-        config='--psm 7 -c tessedit_char_whitelist=0123456789'
-    )
-    cleaned = re.sub(r'[^0-9]', '', text.strip())
-    if not cleaned:
-        raise ValueError(f"Не удалось распознать число в области {region_name}: '{text}'")
-    return int(cleaned)
-
-def ocr_e(region_name):
-    x, y, w, h = get_region_rect(region_name)
-    screenshot = pyautogui.screenshot(region=(x, y, w, h))
-    img = screenshot.convert('L')
-    img = Image.eval(img, lambda x: 255 - x)
-    img = img.resize((img.width * 4, img.height * 4), Image.Resampling.LANCZOS)
-    img = img.point(lambda p: p > 180 and 255)
-    text = pytesseract.image_to_string(
-        img,
-        config='--psm 7 -c tessedit_char_whitelist=0123456789'
-    )
-    numbers = re.findall(r'\d+', text)
-    if not numbers:
-        raise ValueError(f"Не удалось распознать число в области {region_name}: '{text}'")
-    return int(numbers[0])
-
-def ocr_c(region_name):
-    x, y, w, h = get_region_rect(region_name)
-    screenshot = pyautogui.screenshot(region=(x, y, w, h))
-    img = screenshot.convert('L')
-    img = Image.eval(img, lambda x: 255 - x)          # инверсия
-    img = img.resize((img.width * 4, img.height * 4), Image.Resampling.LANCZOS)
-    img = img.point(lambda p: p > 180 and 255)        # бинаризация
-    text = pytesseract.image_to_string(
-        img,
-        config='--psm 7 -c tessedit_char_whitelist=0123456789'
+# Разметка загружается один раз и перечитывается только при изменении файла
+REGIONS = RegionMap(CONFIG_FILE)
+# Один захват экрана на предмет — области OCR вырезаются из общего кадра
+FRAMES = ScreenFrameSource(REGIONS)
+# Цифры читаются по шаблонам глифов; tesseract (открытый всё время работы) — запасной путь
+FIELD_READER = create_field_reader()
+# Поиск иконок только в области списка результатов L (если она размечена)
+LOCATOR = IconLocator(REGIONS)
+# Сколько следующих предметов искать в той же выдаче поиска
+BATCH_LOOKAHEAD = 8
+# OCR и запись в БД идут в фоновых потоках, пока бот ищет следующий предмет
+# (0 — по-старому, всё в одном потоке)
+PIPELINE_WORKERS = 2
+PIPELINE_QUEUE = 4
+# Сколько дней истории продаж читать по подсказкам (остальные — по высоте
+# столбиков графика K); 1 — на одно наведение меньше, позавчера оценивается
+HISTORY_HOVER_DAYS = 2
+# Записывать каждый прогон (кадры и ввод) в recordings/ для python replay.py
+RECORD_RUNS = False
+# Время каждого этапа по предметам — в stats/ГГГГММДД_ЧЧММСС.jsonl
+# (сравнить два прогона: python telemetry.py старый.jsonl новый.jsonl)
+SAVE_STATS = True
+# Порядок по прошлым ценам: сначала выгодные, промахнувшиеся мимо правила
+# недавно — пропускаются (False — все выбранные по порядку списка)
+PLAN_SCAN = True
+# Сканировать только предметы с устаревшими данными: срок свежести —
+# planner.FRESH_HOURS, у предметов с изменчивой ценой короче
+INCREMENTAL_RUNS = True
+# Отчёт по прибыльности открывается в начале анализа и пополняется по ходу
+# (окно не поверх игры и не забирает фокус); False — только в конце
+LIVE_REPORT = True
+# Журнал готовых предметов (scan_journal.jsonl): после падения или остановки
+# при следующем запуске бот предложит продолжить прогон с того же места
+JOURNAL_RUNS = True
+# Правило выставления ордера (проверить другие пороги без игры: python strategy.py "min_ratio=1.3")
+STRATEGY = BuyStrategy()
+# Цены пишутся в БД пачками через пул соединений
+WRITER = ItemMoneyWriter()
+# Ввод текста: поля A (поиск), F (количество) и G (цена) вводятся посимвольно.
+# Имена полей в CLIPBOARD_FIELDS получают ещё и вставку через буфер обмена:
+# первые вводы проверяются по изменению поля, дальше берётся более быстрый
+# способ. Если игра не принимает вставку — уберите поле из кортежа.
+CLIPBOARD_FIELDS = ('A',)
+
+def create_input(frames):
+    modes = {field: ('batched',) for field in ('A', 'F', 'G')}
+    for field in CLIPBOARD_FIELDS:
+        modes[field] = ('clipboard', 'batched')
+    return FieldInput(
+        {'batched': BatchedInput(delay=0.005), 'clipboard': ClipboardInput()},
+        modes=modes,
+        waiter=ScreenWaiter(frames),
     )
-    numbers = re.findall(r'\d+', text)
-    if not numbers:
-        raise ValueError(f"Не удалось распознать число в области {region_name}: '{text}'")
-    return int(numbers[0])
+
+INPUT = create_input(FRAMES)
+# Несколько клиентов игры одновременно: профили разметки по одному на окно
+# (default — config.json, остальные — profiles/имя.json, создаются в настройке
+# разметки). Предметы делятся между клиентами; одна мышь и клавиатура —
+# ввод по очереди, ожидания экрана и OCR параллельно.
+CLIENT_PROFILES = [DEFAULT_PROFILE]
+
+def create_client(profile):
+    """Клиент игры по профилю разметки: свой захват экрана, ввод и поиск иконок."""
+    if profile == DEFAULT_PROFILE:
+        return ScanClient(profile, REGIONS, FRAMES, INPUT, LOCATOR)
+    regions = RegionMap.for_profile(profile)
+    frames = ScreenFrameSource(regions)
+    return ScanClient(profile, regions, frames, create_input(frames), IconLocator(regions))
 
 # ======================
 # Status Overlay
@@ -184,13 +129,13 @@ class StatusOverlay(QWidget):
             Qt.WindowType.Tool
         )
         self.setAttribute(Qt.WidgetAttribute.WA_TranslucentBackground)
-        self.setFixedSize(300, 80)
+        self.setFixedSize(300, 100)
 
         self.label = QLabel("Работает...", self)
         self.label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.label.setFont(QFont("Segoe UI", 14, QFont.Weight.Bold))
         self.label.setStyleSheet("color: white; background-color: rgba(0,0,0,160); border-radius: 10px; padding: 10px;")
-        self.label.setGeometry(0, 0, 300, 80)
+        self.label.setGeometry(0, 0, 300, 100)
 
         screen = QApplication.primaryScreen().geometry()
         self.move(screen.right() - 320, 40)
@@ -200,6 +145,13 @@ class StatusOverlay(QWidget):
         self.label.setText("Работает...")
         self.show()
 
+    def show_progress(self, done, total, per_minute=0.0, eta=-1.0):
+        if self.label.text() != "На паузе":
+            text = f"Работает... {done}/{total}"
+            if per_minute:
+                text += f"\n{per_minute:.1f} предм./мин · ещё {format_eta(eta if eta >= 0 else None)}"
+            self.label.setText(text)
+
     def show_paused(self):
         self.label.setText("На паузе")
         self.show()
@@ -210,6 +162,46 @@ class StatusOverlay(QWidget):
 # ======================
 # Анализ в потоке
 # ======================
+class ScanWorker(QObject):
+    """Scanner в отдельном QThread; ход работы отдаёт в GUI сигналами."""
+
+    progress = pyqtSignal(int, int, float, float)  # сделано, всего, предм./мин, осталось с (-1 — неизвестно)
+    item_done = pyqtSignal(object)           # (item_id, buy, sale, lastday, last2day)
+    state_changed = pyqtSignal(str)          # running / paused / stopping
+    finished = pyqtSignal(list)              # results
+
+    def __init__(self, scanner, start_delay=3, journal=None):
+        super().__init__()
+        self.scanner = scanner
+        self.start_delay = start_delay
+        self.journal = journal
+        scanner.on_progress = self.on_progress
+        scanner.on_result = self.item_done.emit
+        scanner.on_item_done = self.on_item_done
+        scanner.control.on_change = self.state_changed.emit
+
+    def on_item_done(self, result):
+        # в журнал — только когда выставлен и отложенный ордер (конвейер);
+        # пишется в потоке сканирования — не зависит от того, успел ли GUI
+        if self.journal is not None:
+            self.journal.record(result)
+
+    def on_progress(self, done, total):
+        stats = self.scanner.stats
+        eta = stats.eta(done, total)
+        self.progress.emit(done, total, stats.items_per_minute(), -1.0 if eta is None else eta)
+
+    def run(self):
+        # finished — всегда: иначе GUI остаётся «в работе», а журнал не закрывается
+        results = None
+        try:
+            results = self.scanner.run(self.start_delay)
+        except Exception as e:
+            print(f"❌ Сканирование остановилось с ошибкой: {e}")
+        finally:
+            if results is None:
+                results = list(getattr(self.scanner, 'results', []))
+            self.finished.emit(results)
 
 
 # ======================
@@ -233,6 +225,87 @@ CHECKBOX_STYLE = """
 # ======================
 # Окно выбора предметов
 # ======================
+class ItemListModel(QAbstractListModel):
+    """Каталог для окна выбора: отметки — один массив numpy, без виджета на строку.
+
+    Список рисует только видимые строки, поэтому окно с тысячами предметов
+    открывается сразу; «выбрать все» — одно присваивание в массив и один
+    сигнал dataChanged.
+    """
+
+    def __init__(self, items=(), parent=None):
+        super().__init__(parent)
+        self.items = list(items)
+        self.checked = np.ones(len(self.items), dtype=bool)
+        self.search_keys = [self.search_key(item) for item in self.items]
+
+    @staticmethod
+    def search_key(item):
+        """Имя, поисковый запрос и тир: «… следопыта 4» ищется и как «t4»."""
+        key = f"{item.name} {item.namebot}".lower()
+        tier = item.name.rsplit(' ', 1)[-1]
+        return f"{key} t{tier}" if tier.isdigit() else key
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.items)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self.items[index.row()].name
+        if role == Qt.ItemDataRole.CheckStateRole:
+            return Qt.CheckState.Checked if self.checked[index.row()] else Qt.CheckState.Unchecked
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.ItemFlag.NoItemFlags
+        return Qt.ItemFlag.ItemIsEnabled | Qt.ItemFlag.ItemIsSelectable | Qt.ItemFlag.ItemIsUserCheckable
+
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        if not index.isValid() or role != Qt.ItemDataRole.CheckStateRole:
+            return False
+        self.checked[index.row()] = Qt.CheckState(value) == Qt.CheckState.Checked
+        self.dataChanged.emit(index, index, [Qt.ItemDataRole.CheckStateRole])
+        return True
+
+    def matches(self, row, tokens):
+        key = self.search_keys[row]
+        return all(token in key for token in tokens)
+
+    def matching_rows(self, tokens):
+        if not tokens:
+            return slice(None)
+        return np.fromiter((row for row, key in enumerate(self.search_keys)
+                            if all(token in key for token in tokens)), dtype=np.intp)
+
+    def set_checked(self, value, tokens=()):
+        """Отметить или снять все строки, подходящие под поиск (без поиска — все)."""
+        if not self.items:
+            return
+        self.checked[self.matching_rows(tokens)] = value
+        self.dataChanged.emit(self.index(0), self.index(len(self.items) - 1), [Qt.ItemDataRole.CheckStateRole])
+
+    def checked_items(self):
+        return [self.items[row] for row in np.flatnonzero(self.checked)]
+
+
+class ItemSearchProxy(QSortFilterProxyModel):
+    """Поиск по словам: каждое слово должно встречаться в имени или запросе."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.tokens = ()
+
+    def set_query(self, text):
+        self.tokens = tuple(text.lower().split())
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        return not self.tokens or self.sourceModel().matches(source_row, self.tokens)
+
+
 class SelectionWindow(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -255,10 +328,43 @@ class SelectionWindow(QDialog):
         header_layout.addStretch()
         header_layout.addWidget(self.master_checkbox)
         main_layout.addLayout(header_layout)
+        self.fresh_label = QLabel()
+        self.fresh_label.setStyleSheet("color: #aaaaaa; font-size: 11px;")
+        self.fresh_label.hide()
+        main_layout.addWidget(self.fresh_label)
         main_layout.addSpacing(10)
 
-        self.list_widget = QListWidget()
-        main_layout.addWidget(self.list_widget)
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("🔍 Поиск: имя или тир (например, следопыта t4)")
+        self.search_edit.textChanged.connect(self.on_search)
+        main_layout.addWidget(self.search_edit)
+
+        self.model = ItemListModel()
+        self.proxy = ItemSearchProxy(self)
+        self.proxy.setSourceModel(self.model)
+        self.list_view = QListView()
+        self.list_view.setModel(self.proxy)
+        # одинаковая высота строк — список не измеряет каждую строку
+        self.list_view.setUniformItemSizes(True)
+        self.list_view.setStyleSheet("""
+            QListView {
+                color: white;
+                font-size: 12px;
+            }
+            QListView::item {
+                padding: 8px 10px;
+            }
+            QListView::indicator {
+                width: 20px;
+                height: 20px;
+                border: 2px solid #555;
+                background-color: black;
+            }
+            QListView::indicator:checked {
+                background-color: white;
+            }
+        """)
+        main_layout.addWidget(self.list_view)
 
         button_layout = QHBoxLayout()
         self.back_btn = QPushButton("← Назад")
@@ -295,54 +401,51 @@ class SelectionWindow(QDialog):
         main_layout.addLayout(button_layout)
 
         self.setLayout(main_layout)
+        self.planner = None
+        self.fresh = np.zeros(0, dtype=bool)
+        self.load_plan()
         self.load_items()
 
+    def load_plan(self):
+        """Прошлые цены для плана сканирования — один раз при открытии окна."""
+        if not PLAN_SCAN:
+            return
+        try:
+            self.planner = ScanPlanner.load(incremental=INCREMENTAL_RUNS, strategy=STRATEGY)
+        except Exception as e:
+            print(f"⚠️ План сканирования недоступен: {e} → все предметы по порядку")
+
+    def update_fresh_label(self, *args):
+        if not self.fresh.any():
+            return
+        skipped = int(np.count_nonzero(self.fresh & self.model.checked))
+        self.fresh_label.setText(f"⏭ Свежие данные — будут пропущены: {skipped}")
+        self.fresh_label.show()
+
     def load_items(self):
+        self.catalog = ItemCatalog([])
         try:
-            items = read_items_from_db()
-            for item_id, name, namebot in items:
-                item_widget = QWidget()
-                item_layout = QHBoxLayout(item_widget)
-                label = QLabel(name)
-                label.setStyleSheet("color: white; font-size: 12px;")
-                checkbox = QCheckBox()
-                checkbox.setChecked(True)
-                checkbox.setProperty("item_id", item_id)
-                checkbox.setProperty("namebot", namebot)
-                checkbox.setStyleSheet(CHECKBOX_STYLE)
-
-                item_layout.addWidget(label)
-                item_layout.addStretch()
-                item_layout.addWidget(checkbox)
-                item_layout.setContentsMargins(10, 8, 10, 8)
-
-                list_item = QListWidgetItem()
-                list_item.setSizeHint(item_widget.sizeHint())
-                self.list_widget.addItem(list_item)
-                self.list_widget.setItemWidget(list_item, item_widget)
+            self.catalog = ItemCatalog.load()
         except Exception as e:
             print(f"❌ Ошибка загрузки списка: {e}")
+        self.model = ItemListModel(self.catalog)
+        self.proxy.setSourceModel(self.model)
+        self.model.dataChanged.connect(self.update_fresh_label)
+        self.fresh = np.zeros(len(self.model.items), dtype=bool)
+        if self.planner is not None:
+            fresh_ids = self.planner.fresh_ids(self.catalog)
+            self.fresh = np.array([item.id in fresh_ids for item in self.model.items], dtype=bool)
+        self.update_fresh_label()
+
+    def on_search(self, text):
+        self.proxy.set_query(text)
 
     def toggle_all(self, state):
-        checked = state == Qt.CheckState.Checked.value
-        for i in range(self.list_widget.count()):
-            widget = self.list_widget.itemWidget(self.list_widget.item(i))
-            if widget:
-                cb = widget.findChild(QCheckBox)
-                if cb:
-                    cb.setChecked(checked)
+        """Отметить или снять все видимые (подходящие под поиск) предметы."""
+        self.model.set_checked(state == Qt.CheckState.Checked.value, self.proxy.tokens)
 
     def get_selected_items(self):
-        selected = []
-        for i in range(self.list_widget.count()):
-            widget = self.list_widget.itemWidget(self.list_widget.item(i))
-            if widget:
-                checkbox = widget.findChild(QCheckBox)
-                if checkbox and checkbox.isChecked():
-                    item_id = checkbox.property("item_id")
-                    namebot = checkbox.property("namebot")
-                    selected.append((item_id, namebot))
-        return selected
+        return self.model.checked_items()
 
 # ======================
 # TooltipWindow, ResizableOverlay, SetupWindow — без изменений
@@ -358,10 +461,10 @@ class TooltipWindow(QWidget):
             Qt.WindowType.WindowStaysOnTopHint
         )
         self.setAttribute(Qt.WidgetAttribute.WA_TranslucentBackground)
-        self.setFixedSize(480, 320)
+        self.setFixedSize(480, 380)
 
         self.container = QFrame(self)
-        self.container.setGeometry(0, 0, 480, 320)
+        self.container.setGeometry(0, 0, 480, 380)
         self.container.setStyleSheet("""
             QFrame {
                 background-color: #2a2a3f;
@@ -390,7 +493,7 @@ class TooltipWindow(QWidget):
         self.close_btn.clicked.connect(self.close)
 
         self.content_frame = QFrame(self.container)
-        self.content_frame.setGeometry(30, 25, 420, 270)
+        self.content_frame.setGeometry(30, 25, 420, 330)
         layout = QVBoxLayout(self.content_frame)
         layout.setContentsMargins(0, 0, 0, 0)
         layout.setSpacing(14)
@@ -409,7 +512,10 @@ class TooltipWindow(QWidget):
             "<b>E</b> — правый нижний угол: количество проданных день назад",
             "<b>Центр F</b> — ползунок количества товара",
             "<b>Центр G</b> — поле с ценой товара",
-            "<b>Центр H</b> — кнопка «Заказ на покупку»"
+            "<b>Центр H</b> — кнопка «Заказ на покупку»",
+            "<b>K</b> — график истории продаж (столбики по дням), необязательно",
+            "<b>L</b> — список результатов поиска (здесь ищутся иконки), необязательно",
+            "K и L сохраняются, только если их передвинули; правый клик — «не используется»"
         ]
 
         explanation_label = QLabel("<br>".join(explanations))
@@ -423,9 +529,12 @@ class TooltipWindow(QWidget):
 
 
 class ResizableOverlay(QWidget):
-    def __init__(self, name, geometry=None, parent=None):
+    def __init__(self, name, geometry=None, optional=False, parent=None):
         super().__init__(parent)
         self.name = name
+        self.optional = optional
+        # необязательная область без разметки не сохраняется, пока её не передвинут
+        self.placed = geometry is not None or not optional
         self.setWindowFlags(
             Qt.WindowType.FramelessWindowHint |
             Qt.WindowType.WindowStaysOnTopHint |
@@ -447,6 +556,7 @@ class ResizableOverlay(QWidget):
         self.label.setStyleSheet("color: white; font-weight: bold; background-color: rgba(255,0,0,120);")
         self.label.setAlignment(Qt.AlignmentFlag.AlignCenter)
         self.label.setGeometry(0, 0, 30, 20)
+        self.update_label()
 
         self.dragging = False
         self.resizing = False
@@ -473,8 +583,22 @@ class ResizableOverlay(QWidget):
         elif on_bottom: return Qt.CursorShape.SizeVerCursor, 'bottom'
         else: return Qt.CursorShape.SizeAllCursor, 'move'
 
+    def update_label(self):
+        self.label.setText(self.name if self.placed else f"{self.name} —")
+        self.label.setToolTip("" if self.placed else "Не используется: передвиньте, чтобы задать область")
+        self.update()
+
+    def set_placed(self, placed):
+        self.placed = placed or not self.optional
+        self.update_label()
+
     def mousePressEvent(self, event):
+        if event.button() == Qt.MouseButton.RightButton and self.optional:
+            # правый клик — область снова «не используется»
+            self.set_placed(False)
         if event.button() == Qt.MouseButton.LeftButton:
+            if not self.placed:
+                self.set_placed(True)
             cursor_shape, direction = self.get_cursor_for_position(event.pos())
             if direction == 'move':
                 self.dragging = True
@@ -527,6 +651,8 @@ class ResizableOverlay(QWidget):
     def paintEvent(self, event):
         painter = QPainter(self)
         pen = QPen(QColor(255, 0, 0), 2)
+        if not self.placed:
+            pen = QPen(QColor(160, 160, 160), 2, Qt.PenStyle.DashLine)
         painter.setPen(pen)
         painter.setBrush(Qt.BrushStyle.NoBrush)
         painter.drawRect(0, 0, self.width() - 1, self.height() - 1)
@@ -537,29 +663,47 @@ class ResizableOverlay(QWidget):
 
 
 class SetupWindow:
-    def __init__(self, main_window):
+    def __init__(self, main_window, profile=DEFAULT_PROFILE):
         self.main_window = main_window
+        self.profile = profile
         self.overlays = []
         self.load_config()
         self.show_overlays()
         self.create_buttons()
 
     def load_config(self):
-        if os.path.exists(CONFIG_FILE):
-            with open(CONFIG_FILE, 'r', encoding='utf-8') as f:
+        path = profile_path(self.profile)
+        if os.path.exists(path):
+            with open(path, 'r', encoding='utf-8') as f:
                 self.config = json.load(f)
         else:
             self.config = {}
 
+    def switch_profile(self, profile):
+        """Другой профиль (окно клиента): области перерисовываются по его разметке."""
+        profile = profile.strip()
+        if not profile or profile == self.profile:
+            return
+        # новый профиль начинается с разметки текущего — её остаётся сдвинуть
+        current = {overlay.name: overlay.get_config() for overlay in self.overlays if overlay.placed}
+        for overlay in self.overlays:
+            overlay.close()
+        self.overlays = []
+        self.profile = profile
+        self.load_config()
+        if not self.config:
+            self.config = current
+        self.show_overlays()
+        self.button_container.raise_()
+
     def show_overlays(self):
-        names = ['A', 'B', 'C', 'D', 'D1', 'E', 'F', 'G', 'H', 'J']
-        for name in names:
+        for name in REGION_NAMES:
             geo_dict = self.config.get(name)
             geo = QRect(
                 geo_dict['x'], geo_dict['y'],
                 geo_dict['width'], geo_dict['height']
             ) if geo_dict else None
-            overlay = ResizableOverlay(name, geo)
+            overlay = ResizableOverlay(name, geo, optional=name in OPTIONAL_REGIONS)
             overlay.show()
             self.overlays.append(overlay)
 
@@ -609,7 +753,22 @@ class SetupWindow:
             }
         """)
 
+        # Профиль разметки — по одному на окно клиента (новое имя — новый профиль)
+        self.profile_combo = QComboBox()
+        self.profile_combo.setEditable(True)
+        self.profile_combo.addItems(list_profiles())
+        self.profile_combo.setCurrentText(self.profile)
+        self.profile_combo.setFixedSize(160, 40)
+        self.profile_combo.setFont(QFont("Segoe UI", 11))
+        self.profile_combo.setStyleSheet("background-color: #2a2a3a; color: white; border-radius: 8px; padding: 4px;")
+        # переключение — по выбору из списка или после ввода имени, а не на каждую букву
+        self.profile_combo.activated.connect(lambda _: self.switch_profile(self.profile_combo.currentText()))
+        self.profile_combo.lineEdit().editingFinished.connect(
+            lambda: self.switch_profile(self.profile_combo.currentText())
+        )
+
         h_layout.addWidget(self.back_btn)
+        h_layout.addWidget(self.profile_combo)
         h_layout.addWidget(self.save_btn)
         h_layout.setAlignment(Qt.AlignmentFlag.AlignCenter)
 
@@ -618,7 +777,7 @@ class SetupWindow:
         layout.setContentsMargins(0, 0, 0, 0)
         self.button_container.setLayout(layout)
 
-        container_width = 130 + 180 + 20
+        container_width = 130 + 160 + 180 + 20 * 2
         container_height = 50
         x = screen.center().x() - container_width // 2
         y = screen.bottom() - container_height - 20
@@ -628,10 +787,16 @@ class SetupWindow:
     def save_config(self):
         config = {}
         for overlay in self.overlays:
-            config[overlay.name] = overlay.get_config()
-        with open(CONFIG_FILE, 'w', encoding='utf-8') as f:
+            # неразмеченные K и L не пишем: иначе вместо запасного пути — область по умолчанию
+            if overlay.placed:
+                config[overlay.name] = overlay.get_config()
+        path = profile_path(self.profile)
+        if self.profile != DEFAULT_PROFILE:
+            os.makedirs(PROFILES_DIR, exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as f:
             json.dump(config, f, ensure_ascii=False, indent=4)
-        print("✅ Конфигурация сохранена в", CONFIG_FILE)
+        REGIONS.invalidate()
+        print("✅ Конфигурация сохранена в", path)
         self.cleanup()
 
     def on_back(self):
@@ -645,51 +810,151 @@ class SetupWindow:
         self.main_window.show()
 
 # ======================
-# Окно отчёта по прибыльным предметам
+# Отчёт по прибыльности
 # ======================
+class ProfitTableModel(QAbstractTableModel):
+    """Предметы прогона для отчёта: строка добавляется, как только предмет готов.
+
+    Строка — (имя, закуп, продажа, прибыль, продано за 2 дня). Вставка в
+    конец — O(1), представление перерисовывает только видимые строки,
+    поэтому десятки тысяч предметов не тормозят GUI.
+    """
+
+    COLUMNS = ("Предмет", "Закуп", "Продажа", "Прибыль", "Продано за 2 дня")
+    RATIO = 3
+    VOLUME = 4
+
+    def __init__(self, catalog=None, parent=None):
+        super().__init__(parent)
+        self.catalog = catalog or ItemCatalog([])
+        self.rows = []
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLUMNS)
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.COLUMNS[section]
+        return None
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        value = self.rows[index.row()][index.column()]
+        if role == Qt.ItemDataRole.UserRole:
+            return value
+        if role == Qt.ItemDataRole.DisplayRole:
+            return f"x{value:.2f}" if index.column() == self.RATIO else str(value)
+        if role == Qt.ItemDataRole.TextAlignmentRole and index.column() > 0:
+            return Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter
+        return None
+
+    def add_result(self, result):
+        item_id, buy, sale, lastday, last2day = result
+        ratio = sale / buy if buy and buy > 0 and sale else 0.0
+        row = len(self.rows)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.rows.append((self.catalog.name(item_id), buy, sale, ratio, (lastday or 0) + (last2day or 0)))
+        self.endInsertRows()
+
+    def reset(self, catalog):
+        self.beginResetModel()
+        self.catalog = catalog
+        self.rows = []
+        self.endResetModel()
+
+
+class ProfitFilterProxy(QSortFilterProxyModel):
+    """Сортировка по числам (UserRole) и фильтр по прибыли и объёму."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.ratio_filter = None
+        self.min_volume = 0
+        self.setSortRole(Qt.ItemDataRole.UserRole)
+        self.setDynamicSortFilter(True)
+
+    def set_filter(self, ratio_filter, min_volume):
+        self.ratio_filter = ratio_filter
+        self.min_volume = min_volume
+        self.invalidateFilter()
+
+    def filterAcceptsRow(self, source_row, source_parent):
+        _, _, _, ratio, volume = self.sourceModel().rows[source_row]
+        if volume < self.min_volume:
+            return False
+        return self.ratio_filter is None or self.ratio_filter(ratio)
+
+
 class ProfitReportWindow(QDialog):
-    def __init__(self, profitable_items, parent=None):
+    """Живой отчёт: таблица поверх ProfitTableModel, сортировка по столбцам, фильтры."""
+
+    def __init__(self, model, strategy, parent=None):
         super().__init__(parent)
-        self.setWindowTitle("💰 Высокоприбыльные предметы (>200%)")
-        self.setWindowFlags(Qt.WindowType.WindowStaysOnTopHint | Qt.WindowType.Dialog)
-        self.setModal(True)
-        self.resize(500, 400)
+        self.setWindowTitle("💰 Отчёт по прибыльности")
+        self.setWindowFlags(Qt.WindowType.Window)
+        # Во время анализа окно не должно забирать фокус у игры
+        self.setAttribute(Qt.WidgetAttribute.WA_ShowWithoutActivating)
+        self.resize(640, 480)
+        self.setStyleSheet("""
+            QDialog, QTableView, QComboBox, QSpinBox {
+                background-color: #2a2a3a;
+                color: #e0e0ff;
+            }
+            QTableView {
+                border: 1px solid #555;
+                border-radius: 6px;
+                gridline-color: #3a3a4a;
+            }
+            QHeaderView::section {
+                background-color: #3a3a5a;
+                color: white;
+                padding: 4px;
+                border: none;
+            }
+        """)
+
+        low, high = strategy.min_ratio, strategy.max_ratio
+        self.filters = [
+            (f"> {high - 1:.0%} (x{high:g}+)", lambda ratio: ratio > high),
+            (f"{low - 1:.0%}–{high - 1:.0%} — ордер", lambda ratio: low <= ratio <= high),
+            ("Все", None),
+        ]
+
+        self.proxy = ProfitFilterProxy(self)
+        self.proxy.setSourceModel(model)
 
         layout = QVBoxLayout()
+        filter_layout = QHBoxLayout()
+        self.ratio_combo = QComboBox()
+        for label, _ in self.filters:
+            self.ratio_combo.addItem(label)
+        self.volume_spin = QSpinBox()
+        self.volume_spin.setRange(0, 10 ** 7)
+        self.volume_spin.setSingleStep(10)
+        self.count_label = QLabel()
+        self.count_label.setStyleSheet("color: #aaaaaa;")
+        filter_layout.addWidget(QLabel("Прибыль:"))
+        filter_layout.addWidget(self.ratio_combo)
+        filter_layout.addWidget(QLabel("Продано за 2 дня от:"))
+        filter_layout.addWidget(self.volume_spin)
+        filter_layout.addStretch()
+        filter_layout.addWidget(self.count_label)
+        layout.addLayout(filter_layout)
+
+        self.table = QTableView()
+        self.table.setModel(self.proxy)
+        self.table.setSortingEnabled(True)
+        self.table.sortByColumn(ProfitTableModel.RATIO, Qt.SortOrder.DescendingOrder)
+        self.table.verticalHeader().hide()
+        self.table.setSelectionBehavior(QTableView.SelectionBehavior.SelectRows)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
+        self.table.setFont(QFont("Segoe UI", 10))
+        layout.addWidget(self.table)
 
-        if not profitable_items:
-            label = QLabel("📉 Нет предметов с прибылью >200%.")
-            label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-            label.setStyleSheet("font-size: 14px; color: #ffcccc;")
-            layout.addWidget(label)
-        else:
-            title = QLabel("💰 ВЫСОКОПРИБЫЛЬНЫЕ ПРЕДМЕТЫ (>200% прибыли)")
-            title.setAlignment(Qt.AlignmentFlag.AlignCenter)
-            title.setStyleSheet("font-size: 16px; font-weight: bold; color: #aaffaa; margin-bottom: 10px;")
-            layout.addWidget(title)
-
-            self.list_widget = QListWidget()
-            self.list_widget.setStyleSheet("""
-                QListWidget {
-                    background-color: #2a2a3a;
-                    color: #e0e0ff;
-                    border: 1px solid #555;
-                    border-radius: 6px;
-                }
-                QListWidget::item {
-                    padding: 8px;
-                    border-bottom: 1px solid #3a3a4a;
-                }
-            """)
-            for name, buy, sale, ratio in profitable_items:
-                item_text = f"{name}\n  Закуп: {buy} | Продажа: {sale} | x{ratio:.2f}"
-                item = QListWidgetItem(item_text)
-                item.setFont(QFont("Segoe UI", 10))
-                self.list_widget.addItem(item)
-
-            layout.addWidget(self.list_widget)
-
-        # Кнопка закрытия
         close_btn = QPushButton("Закрыть")
         close_btn.setFixedSize(120, 36)
         close_btn.setStyleSheet("""
@@ -703,15 +968,30 @@ class ProfitReportWindow(QDialog):
                 background-color: #4a6a4a;
             }
         """)
-        close_btn.clicked.connect(self.accept)
+        close_btn.clicked.connect(self.hide)
         btn_layout = QHBoxLayout()
         btn_layout.addStretch()
         btn_layout.addWidget(close_btn)
         btn_layout.addStretch()
         layout.addLayout(btn_layout)
-
         self.setLayout(layout)
 
+        self.ratio_combo.currentIndexChanged.connect(self.apply_filter)
+        self.volume_spin.valueChanged.connect(self.apply_filter)
+        for signal in (self.proxy.rowsInserted, self.proxy.rowsRemoved,
+                       self.proxy.modelReset, self.proxy.layoutChanged):
+            signal.connect(self.update_count)
+        self.apply_filter()
+
+    def apply_filter(self):
+        _, ratio_filter = self.filters[self.ratio_combo.currentIndex()]
+        self.proxy.set_filter(ratio_filter, self.volume_spin.value())
+        self.update_count()
+
+    def update_count(self, *args):
+        total = self.proxy.sourceModel().rowCount()
+        self.count_label.setText(f"Показано {self.proxy.rowCount()} из {total}")
+
 # ======================
 # MainWindow
 # ======================
@@ -724,18 +1004,23 @@ class MainWindow(QWidget):
         self.apply_styles()
         self.status_overlay = StatusOverlay()
         self.is_running = False
-        self.current_item_index = 0
         self.selected_items = []
-        self._pause = False
-        self._stop = False
+        self.catalog = ItemCatalog([])
+        self.control = None
+        self.recorder = None
+        self.report_model = ProfitTableModel()
+        self.report_window = None
+        self.journal = None
+        self.journal_results = []
+        self.scan_thread = None
+        self.scan_worker = None
 
         # Регистрируем хоткеи ОДИН РАЗ при запуске
         keyboard.add_hotkey('ctrl + x', self.toggle_pause_safe)
         keyboard.add_hotkey('ctrl + z', self.request_stop_safe)
 
-        # Таймер для пошагового выполнения
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.process_next_item)
+        if JOURNAL_RUNS:
+            QTimer.singleShot(0, self.offer_resume)
 
     def setup_ui(self):
         layout = QVBoxLayout()
@@ -820,258 +1105,172 @@ class MainWindow(QWidget):
             if not selected_items:
                 print("⚠️ Нет выбранных предметов.")
                 return
+            if selection_window.planner is not None:
+                plan = selection_window.planner.plan(selected_items)
+                print(ScanPlanner.summary(plan))
+                selected_items = plan.items
+                if not selected_items:
+                    print("✅ Данные всех выбранных предметов свежие или недавно не прошли правило — сканировать нечего.")
+                    return
+            self.start_analysis(selected_items, selection_window.catalog)
+
+    def offer_resume(self):
+        """Прерванный прогон в журнале — предложить продолжить с места остановки."""
+        state = interrupted_run()
+        if state is None:
+            return
+        started = time.strftime("%d.%m %H:%M", time.localtime(state.started))
+        answer = QMessageBox.question(
+            self, "Продолжить прогон?",
+            f"Прогон от {started} прерван: готово {len(state.results)} из {len(state.item_ids)} предметов.\n"
+            "Продолжить с места остановки?"
+        )
+        if answer != QMessageBox.StandardButton.Yes:
+            return
+        try:
+            catalog = ItemCatalog.load()
+        except Exception as e:
+            print(f"❌ Ошибка загрузки списка: {e}")
+            return
+        items = [item for item in map(catalog.get, remaining_ids(state)) if item is not None]
+        print(f"🔁 Продолжение прогона: осталось {len(items)} из {len(state.item_ids)} предм.")
+        if items:
+            self.start_analysis(items, catalog, state.results)
 
-            self.hide()
-            self.is_running = True
-            self._pause = False
-            self._stop = False
-            self.selected_items = selected_items
-            self.current_item_index = 0
-            self.results = []
-            self.status_overlay.show_running()
-            print("⏳ Начало анализа через 3 секунды...")
-            QTimer.singleShot(3000, self.start_timer)
-
-    def start_timer(self):
-        if self.is_running:
-            self.timer.start(100)  # каждые 100 мс — проверка состояния и шаг
-
+    def start_analysis(self, selected_items, catalog, done_results=()):
+        """Запуск сканирования; done_results — готовые предметы прерванного прогона из журнала."""
+        self.hide()
+        self.is_running = True
+        self.selected_items = selected_items
+        self.catalog = catalog
+        self.results = []
+        self.journal_results = list(done_results)
+        # отчёт сразу содержит всё, что готово по журналу
+        self.report_model.reset(self.catalog)
+        for result in self.journal_results:
+            self.report_model.add_result(result)
+        if LIVE_REPORT:
+            self.open_report()
+        self.status_overlay.show_running()
+
+        self.journal = None
+        if JOURNAL_RUNS:
+            self.journal = ScanJournal()
+            if done_results:
+                self.journal.resume()
+            else:
+                self.journal.start(selected_items)
+
+        # Сканирование — в отдельном потоке, GUI остаётся отзывчивым
+        self.control = ScanControl()
+        settings = {
+            'lookahead': BATCH_LOOKAHEAD,
+            'pipeline_workers': PIPELINE_WORKERS,
+            'history_days': HISTORY_HOVER_DAYS,
+        }
+        self.recorder = None
+        if len(CLIENT_PROFILES) > 1:
+            if RECORD_RUNS:
+                print("⚠️ Запись прогона поддерживается только для одного клиента — не пишем")
+            scanner = ParallelScan(
+                [create_client(profile) for profile in CLIENT_PROFILES],
+                selected_items, FIELD_READER, WRITER,
+                control=self.control, pipeline_queue=PIPELINE_QUEUE, strategy=STRATEGY,
+                stats_factory=lambda client, shard: RunStats(
+                    new_stats_path(suffix=f"_{client.name}") if SAVE_STATS else None, total=len(shard)
+                ),
+                **settings
+            )
+        else:
+            client = create_client(CLIENT_PROFILES[0])
+            frames, input_backend = client.frames, client.input_backend
+            if RECORD_RUNS:
+                self.recorder = ScanRecorder(new_recording_folder(), client.regions, selected_items, settings)
+                frames, input_backend = self.recorder.frames(frames), self.recorder.inputs(input_backend)
+            scanner = Scanner(
+                selected_items, client.regions, frames, client.locator, FIELD_READER, WRITER,
+                control=self.control, pipeline_queue=PIPELINE_QUEUE,
+                input_backend=input_backend, strategy=STRATEGY,
+                stats=RunStats(new_stats_path() if SAVE_STATS else None, total=len(selected_items)),
+                on_values=self.recorder.on_values if self.recorder else None,
+                **settings
+            )
+        self.scan_thread = QThread()
+        self.scan_worker = ScanWorker(scanner, journal=self.journal)
+        self.scan_worker.moveToThread(self.scan_thread)
+        self.scan_thread.started.connect(self.scan_worker.run)
+        self.scan_worker.state_changed.connect(self.on_scan_state_changed)
+        self.scan_worker.progress.connect(self.status_overlay.show_progress)
+        self.scan_worker.item_done.connect(self.report_model.add_result)
+        self.scan_worker.finished.connect(self.finish_analysis)
+        self.scan_worker.finished.connect(self.scan_thread.quit)
+        self.scan_thread.start()
+
+    # Горячие клавиши приходят из потока keyboard — состояние меняется сразу,
+    # оверлей обновляется сигналом state_changed в потоке GUI
     def toggle_pause_safe(self):
         if self.is_running:
-            self.toggle_pause()
+            self.control.toggle_pause()
 
     def request_stop_safe(self):
         if self.is_running:
-            self.request_stop()
+            print("⏹ Запрошена остановка...")
+            self.control.stop()
 
-    def toggle_pause(self):
-        self._pause = not self._pause
-        if self._pause:
+    def on_scan_state_changed(self, state):
+        if state == PAUSED:
             self.status_overlay.show_paused()
             print("⏸ Пауза")
-        else:
+        elif state == RUNNING:
             self.status_overlay.show_running()
             print("▶ Возобновлено")
 
-    def request_stop(self):
-        print("⏹ Запрошена остановка...")
-        self._stop = True
-
-    def process_next_item(self):
-        if self._stop:
-            self.finish_analysis()
-            return
-
-        if self._pause:
-            return  # просто ждём
-
-        if self.current_item_index >= len(self.selected_items):
-            self.finish_analysis()
-            return
-
-        item_id, namebot = self.selected_items[self.current_item_index]
-        try:
-            print(f"📋 Обработка: ID={item_id}, '{namebot}'")
-
-            # === Ввод поиска ===
-            click_and_type('A', namebot)
-
-            # === Поиск изображения pic/{name}.png ===
-            # Получаем имя из БД (нужно для имени файла)
-            with get_db_connection() as conn:
-                with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                    cur.execute("SELECT name FROM items WHERE id = %s", (item_id,))
-                    row = cur.fetchone()
-                    name = row['name'] if row else str(item_id)
-
-            image_path = os.path.join("pic", f"{name}.png")
-            if not os.path.exists(image_path):
-                print(f"⚠️ Файл изображения не найден: {image_path}")
-                click_center('J')
-                time.sleep(0.25)
-                self.current_item_index += 1
-                return
-
-            # 🔍 Без confidence! Без OpenCV!
-            location = pyautogui.locateOnScreen(image_path, confidence=0.85)
-            if location is None:
-                print(f"❌ Изображение не найдено на экране: {name}")
-                click_center('J')
-                time.sleep(0.25)
-                self.current_item_index += 1
-                return
-
-            center_x = location.left + location.width // 2
-            center_y = location.top + location.height // 2
-
-            # Получаем смещение — ширина области B из конфига
-            _, _, w_B, _ = get_region_rect('B')
-            target_x = center_x + w_B
-            target_y = center_y
-
-            print(f"🎯 Найдено изображение: ({center_x}, {center_y}) → клик в ({target_x}, {target_y})")
-            pyautogui.click(target_x, target_y)
-            time.sleep(0.25)
-
-            # === Продажа (D → sale) ===
-            sale_raw = 0
-            try:
-                sale_raw = ocr_d_or_d1('D')
-                print(f"📈 Продажа (D): {sale_raw}")
-            except Exception as e:
-                print(f"⚠️ Ошибка D: {e} → будет записано 0")
-                sale_raw = 0
-
-            # === Закупка (D1 → buy) ===
-            buy_raw = 0
-            try:
-                buy_raw = ocr_d_or_d1('D1')
-                print(f"📈 Закуп (D1): {buy_raw}")
-            except Exception as e:
-                print(f"⚠️ Ошибка D1: {e} → будет записано 0")
-                buy_raw = 0
-
-            # === Продано (E → lastday) ===
-            lastday_raw = 0
-            try:
-                move_to_bottom_right_of('E')
-                time.sleep(0.5)
-                lastday_raw = ocr_e('E')
-                print(f"📦 Продано (E): {lastday_raw}")
-            except Exception as e:
-                print(f"⚠️ Ошибка E: {e} → будет записано 0")
-                lastday_raw = 0
-
-            # === Продано вчера (C → last2day) ===
-            last2day_raw = 0
-            try:
-                move_to_bottom_right_of('C')
-                time.sleep(0.5)
-                last2day_raw = ocr_c('C')
-                print(f"📦 Продано вчера (C): {last2day_raw}")
-            except Exception as e:
-                print(f"⚠️ Ошибка C: {e} → будет записано 0")
-                last2day_raw = 0
-
-            # === Расчёт прибыли и условие для выставления ордера ===
-            total_sold = lastday_raw + last2day_raw
-            buy = buy_raw
-            sale = sale_raw
-
-            # Проверяем, что buy > 0, иначе деление на ноль 
-            should_place_order = False
-            if buy > 0 and total_sold > 10:
-                ratio = sale / buy if sale > 0 else 0
-                if 1.4 <= ratio <= 3.0:  # 40% <= прибыль <= 200%
-                    should_place_order = True
-
-            if should_place_order:
-                print(f"🛒 Условие выполнено: прибыль x{ratio:.2f}, продано за 2 дня: {total_sold}")
-
-                # 1) Определяем количество для заказа
-                if total_sold <= 50:
-                    qty = 1
-                elif total_sold <= 150:
-                    qty = 2
-                elif total_sold <= 500:
-                    qty = 5
-                elif total_sold <= 3000:
-                    qty = 7
-                elif total_sold <= 10000:
-                    qty = 10
-                else:
-                    qty = 25
-
-                # Клик в центр F и ввод количества
-                click_and_type('F', str(qty))
-                time.sleep(0.1)
-
-                # 2) Клик в центр G и ввод цены (D1 + 1)
-                price = sale_raw + 1
-                click_and_type('G', str(price))
-                time.sleep(0.1)
-
-                # 3) Нажатие на кнопку "Заказ на покупку" (H)
-                click_center('H')
-                time.sleep(0.3)
-
-                print(f"✅ Выставлен ордер: кол-во={qty}, цена={price}")
-            else:
-                print("⏭️ Условие не выполнено — пропуск выставления ордера")
-
-            # === Запись в БД ===
-            write_itemmoney(
-                item_id=item_id,
-                buy=int(buy_raw * 1.025),
-                sale=int(sale_raw * 0.935),
-                lastday=lastday_raw,
-                last2day=last2day_raw
-            )
-            print(f"✅ Записано в БД: buy={buy_raw}, sale={sale_raw}, lastday={lastday_raw}")
-
-            self.results.append((item_id, buy_raw, sale_raw))
-
-            click_center('J')
-            time.sleep(0.25)
-
-        except Exception as e:
-            print(f"❌ Ошибка при обработке {item_id}: {e}")
-
-        self.current_item_index += 1
-
-    def finish_analysis(self):
-        self.timer.stop()
+    def finish_analysis(self, results):
+        self.results = self.journal_results + results
+        if self.journal is not None:
+            # остановка по Ctrl+Z — прогон можно будет продолжить при следующем запуске
+            self.journal.close(finished=self.control.state != STOPPING)
+            self.journal = None
+        if self.recorder:
+            self.recorder.close()
+            self.recorder = None
         keyboard.unhook_all_hotkeys()
         self.status_overlay.hide_overlay()
         self.is_running = False
         self.show()
         print("✅ Анализ завершён.")
-        self.show_profit_report(self.results)
+        self.show_profit_report()
 
-    def show_profit_report(self, results):
-        if not results:
-            profitable_items = []
-        else:
-            profitable_items = []
-            with get_db_connection() as conn:
-                with conn.cursor(cursor_factory=RealDictCursor) as cur:
-                    for item_id, buy, sale in results:
-                        if buy and buy > 0:
-                            ratio = sale / buy if sale else 0
-                            if ratio > 3.0:
-                                cur.execute("SELECT name FROM items WHERE id = %s", (item_id,))
-                                row = cur.fetchone()
-                                name = row['name'] if row else f"ID={item_id}"
-                                profitable_items.append((name, buy, sale, ratio))
-
-        report_window = ProfitReportWindow(profitable_items, self)
-        report_window.exec()
+    def open_report(self):
+        if self.report_window is None:
+            self.report_window = ProfitReportWindow(self.report_model, STRATEGY)
+        self.report_window.show()
+        return self.report_window
 
+    def show_profit_report(self):
+        report_window = self.open_report()
+        report_window.raise_()
+        report_window.activateWindow()
+
+        threshold = STRATEGY.max_ratio
+        profitable_items = [row for row in self.report_model.rows if row[ProfitTableModel.RATIO] > threshold]
         if profitable_items:
             print("\n" + "="*60)
-            print("💰 ВЫСОКОПРИБЫЛЬНЫЕ ПРЕДМЕТЫ (>200% прибыли):")
+            print(f"💰 ВЫСОКОПРИБЫЛЬНЫЕ ПРЕДМЕТЫ (>{threshold - 1:.0%} прибыли):")
             print("="*60)
-            for name, buy, sale, ratio in profitable_items:
+            for name, buy, sale, ratio, _ in sorted(profitable_items, key=lambda row: -row[ProfitTableModel.RATIO]):
                 print(f"  • {name}")
                 print(f"    Закуп: {buy}, Продажа: {sale}, Множитель: {ratio:.2f}x")
             print("="*60)
         else:
-            print("\n📉 Нет предметов с прибылью >200%.")
+            print(f"\n📉 Нет предметов с прибылью >{threshold - 1:.0%}.")
 
 
 # ======================
 # Запуск
 # ======================
 if __name__ == "__main__":
-    # ⚠️ Настройте подключение к вашей БД здесь или через .env
-    DB_CONFIG.update({
-        'host': 'localhost',
-        'database': 'postgres',
-        'user': 'postgres',
-        'password': '1111',
-        'port': 5432
-    })
-
+    # Подключение к БД — storage.DB_CONFIG (или переменные окружения PGHOST и др.)
     app = QApplication(sys.argv)
     window = MainWindow()
     window.show()
@@ -0,0 +1,123 @@
+import os
+
+import numpy as np
+from PIL import Image
+
+
+# ======================
+# Кадр экрана
+# ======================
+def to_gray(crop):
+    """Серый массив uint8 из PIL-картинки или RGB-массива (формула как у PIL 'L')."""
+    if isinstance(crop, Image.Image):
+        return np.asarray(crop.convert('L'))
+    if crop.ndim == 2:
+        return crop
+    rgb = crop[..., :3].astype(np.uint32)
+    return ((rgb[..., 0] * 299 + rgb[..., 1] * 587 + rgb[..., 2] * 114) // 1000).astype(np.uint8)
+
+def union_rect(rects):
+    """Ограничивающий прямоугольник для набора (x, y, w, h)."""
+    left = min(x for x, _, _, _ in rects)
+    top = min(y for _, y, _, _ in rects)
+    right = max(x + w for x, _, w, _ in rects)
+    bottom = max(y + h for _, y, _, h in rects)
+    return (left, top, right - left, bottom - top)
+
+
+class Frame:
+    """Один снимок экрана (или его части) в виде массива RGB.
+
+    origin — экранные координаты левого верхнего пикселя массива.
+    Вырезки областей возвращаются как представления (view) без копирования.
+    """
+
+    def __init__(self, array, origin=(0, 0), regions=None):
+        self.array = array
+        self.origin = origin
+        self.regions = regions
+
+    @property
+    def rect(self):
+        h, w = self.array.shape[:2]
+        return (self.origin[0], self.origin[1], w, h)
+
+    def _resolve(self, region):
+        if isinstance(region, str):
+            if self.regions is None:
+                raise ValueError(f"Кадр не знает разметку — нельзя вырезать область '{region}'.")
+            return self.regions.rect(region)
+        return region
+
+    def crop(self, region):
+        """Вырезка области (имя или (x, y, w, h)) как view на массив кадра."""
+        x, y, w, h = self._resolve(region)
+        fx, fy = self.origin
+        fh, fw = self.array.shape[:2]
+        dx, dy = x - fx, y - fy
+        if dx < 0 or dy < 0 or dx + w > fw or dy + h > fh:
+            raise ValueError(f"Область {region} выходит за пределы кадра {self.rect}.")
+        return self.array[dy:dy + h, dx:dx + w]
+
+    def crop_image(self, region):
+        return Image.fromarray(self.crop(region))
+
+
+# ======================
+# Источники кадров
+# ======================
+class ScreenFrameSource:
+    """Снимает экран через pyautogui: один захват на все запрошенные области."""
+
+    def __init__(self, regions):
+        self.regions = regions
+
+    def grab(self, region_names=None, rect=None):
+        import pyautogui
+        if rect is None:
+            if region_names:
+                rect = union_rect([self.regions.rect(name) for name in region_names])
+            else:
+                w, h = pyautogui.size()
+                rect = (0, 0, w, h)
+        screenshot = pyautogui.screenshot(region=rect)
+        return Frame(np.asarray(screenshot.convert('RGB')), origin=rect[:2], regions=self.regions)
+
+
+class FileFrameSource:
+    """Отдаёт заранее сохранённые полноэкранные снимки по очереди.
+
+    Нужен для проверки OCR без игры (в том числе на Linux без дисплея).
+    paths — файл, папка с PNG или список файлов. Последний кадр повторяется,
+    когда список закончился.
+    """
+
+    def __init__(self, paths, regions=None, origin=(0, 0)):
+        if isinstance(paths, (str, os.PathLike)):
+            if os.path.isdir(paths):
+                paths = sorted(
+                    os.path.join(paths, name) for name in os.listdir(paths)
+                    if name.lower().endswith('.png')
+                )
+            else:
+                paths = [paths]
+        if not paths:
+            raise FileNotFoundError("Нет файлов кадров для FileFrameSource.")
+        self.paths = list(paths)
+        self.regions = regions
+        self.origin = origin
+        self.index = 0
+        self._cache = {}
+
+    def _load(self, path):
+        array = self._cache.get(path)
+        if array is None:
+            with Image.open(path) as img:
+                array = np.asarray(img.convert('RGB'))
+            self._cache[path] = array
+        return array
+
+    def grab(self, region_names=None, rect=None):
+        path = self.paths[min(self.index, len(self.paths) - 1)]
+        self.index += 1
+        return Frame(self._load(path), origin=self.origin, regions=self.regions)
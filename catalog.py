@@ -0,0 +1,50 @@
+import os
+from collections import namedtuple
+
+# ======================
+# Константы
+# ======================
+PIC_DIR = "pic"
+
+CatalogItem = namedtuple('CatalogItem', 'id name namebot image_path has_image')
+
+# ======================
+# Каталог предметов
+# ======================
+class ItemCatalog:
+    """Предметы из таблицы items, загруженные один раз на запуск.
+
+    Хранит имя, поисковый запрос, путь к иконке pic/{name}.png и признак
+    того, что иконка есть, — сканированию и отчёту не нужны запросы к БД.
+    """
+
+    def __init__(self, rows, pic_dir=PIC_DIR):
+        try:
+            files = set(os.listdir(pic_dir))
+        except FileNotFoundError:
+            files = set()
+        self.items = []
+        self._by_id = {}
+        for item_id, name, namebot in rows:
+            file_name = f"{name}.png"
+            item = CatalogItem(item_id, name, namebot, os.path.join(pic_dir, file_name), file_name in files)
+            self.items.append(item)
+            self._by_id[item_id] = item
+
+    @classmethod
+    def load(cls, pic_dir=PIC_DIR):
+        from storage import read_items_from_db
+        return cls(read_items_from_db(), pic_dir)
+
+    def get(self, item_id):
+        return self._by_id.get(item_id)
+
+    def name(self, item_id):
+        item = self._by_id.get(item_id)
+        return item.name if item else f"ID={item_id}"
+
+    def __iter__(self):
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
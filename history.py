@@ -0,0 +1,174 @@
+from collections import namedtuple
+
+import numpy as np
+
+from capture import to_gray
+
+# ======================
+# Константы
+# ======================
+CHART_REGION = 'K'     # график истории продаж (столбики по дням)
+BAR_DIFF = 40          # насколько столбик отличается по яркости от фона графика
+AXIS_FILL = 0.9        # строка, закрашенная почти по всей ширине, — ось, а не столбики
+MIN_BAR_WIDTH = 2
+
+# Ключи вырезок подсказок: вчера — E, позавчера — C, дальше E2, E3, ...
+DAY_KEYS = ('E', 'C')
+
+HistoryCapture = namedtuple('HistoryCapture', 'bars tooltips')
+
+def day_key(day):
+    return DAY_KEYS[day] if day < len(DAY_KEYS) else f"E{day}"
+
+
+# ======================
+# Столбики графика
+# ======================
+def bar_heights(chart, diff=BAR_DIFF):
+    """Столбики по одной вырезке графика: [(x центра, высота в пикселях)] слева направо.
+
+    Фон — медиана верхней строки. Высота столбика — сплошной участок
+    «не фона» от нижнего края вверх; строки оси снизу отбрасываются.
+    """
+    gray = to_gray(np.asarray(chart)).astype(np.int16)
+    mask = np.abs(gray - np.median(gray[0])) > diff
+    while mask.shape[0] and mask[-1].mean() >= AXIS_FILL:
+        mask = mask[:-1]
+    if not mask.shape[0]:
+        return []
+    flipped = mask[::-1]
+    heights = np.where(flipped.all(axis=0), flipped.shape[0], flipped.argmin(axis=0))
+
+    bars, start = [], None
+    for x, filled in enumerate(list(heights > 0) + [False]):
+        if filled and start is None:
+            start = x
+        elif not filled and start is not None:
+            if x - start >= MIN_BAR_WIDTH:
+                bars.append(((start + x - 1) // 2, int(heights[start:x].max())))
+            start = None
+    return bars
+
+def align_days(bars, newest_x=None):
+    """Столбики по дням подряд: пропуски (дни без продаж) — столбики высоты 0.
+
+    Шаг между днями — наименьшее расстояние между соседними столбиками;
+    newest_x — где стоит вчерашний столбик (точка E), чтобы не потерять
+    пустые дни справа.
+    """
+    if len(bars) < 2:
+        return list(bars)
+    pitch = min(b[0] - a[0] for a, b in zip(bars, bars[1:]))
+    if pitch <= 0:
+        return list(bars)
+    days = [bars[0]]
+    for x, height in bars[1:]:
+        missing = int(round((x - days[-1][0]) / pitch)) - 1
+        days.extend((days[-1][0] + pitch * (k + 1), 0) for k in range(missing))
+        days.append((x, height))
+    if newest_x is not None:
+        missing = int(round((newest_x - days[-1][0]) / pitch))
+        days.extend((days[-1][0] + pitch * (k + 1), 0) for k in range(max(0, missing)))
+    return days
+
+def daily_volumes(bars, exact):
+    """Объёмы по всем видимым дням, от вчерашнего к более ранним.
+
+    exact — {день: число} по подсказкам; остальные дни оцениваются по
+    высоте столбика в масштабе, который дают точные дни.
+    """
+    if not bars:
+        return [exact[day] for day in sorted(exact)]
+    ratios = [
+        exact[day] / bars[-1 - day][1]
+        for day in exact
+        if day < len(bars) and bars[-1 - day][1] > 0 and exact[day] > 0
+    ]
+    scale = float(np.median(ratios)) if ratios else 0.0
+    volumes = []
+    for day in range(max(len(bars), max(exact, default=-1) + 1)):
+        if day in exact:
+            volumes.append(exact[day])
+        else:
+            volumes.append(int(round(bars[-1 - day][1] * scale)) if day < len(bars) else 0)
+    return volumes
+
+
+# ======================
+# Снятие истории продаж
+# ======================
+class SalesHistoryReader:
+    """Продажи по дням из графика истории одним снимком.
+
+    График (область K) снимается один раз до наведения; затем мышь быстро
+    проходит по нужным столбикам справа налево, и каждая подсказка
+    вырезается, как только появилась (ScreenWaiter). Вчера и позавчера —
+    точки E и C из разметки, более ранние дни — столбики графика со
+    смещением подсказки как у E. Числа остальных дней оцениваются по
+    высоте столбиков (daily_volumes).
+
+    Без области K работает как раньше: наведение на E и C.
+    """
+
+    def __init__(self, regions, frames, waiter, input_backend, hover_days=2, timeout=0.5):
+        self.regions = regions
+        self.frames = frames
+        self.waiter = waiter
+        self.input = input_backend
+        self.hover_days = hover_days
+        self.timeout = timeout
+
+    def chart_rect(self):
+        try:
+            return self.regions.rect(CHART_REGION)
+        except ValueError:
+            return None
+
+    def _hover(self, point, region):
+        before = self.waiter.snapshot(region)
+        self.input.move(*point)
+        frame, _ = self.waiter.until_changed(region, before, self.timeout)
+        if frame is None:
+            frame = self.waiter.grab(region)
+        return frame.crop(region)
+
+    def capture(self):
+        """HistoryCapture(столбики [(x экрана, высота)], {ключ дня: вырезка подсказки})."""
+        tooltips = {}
+        chart = self.chart_rect()
+        if chart is None:
+            for key in DAY_KEYS:
+                tooltips[key] = self._hover(self.regions.bottom_right(key), key)
+            return HistoryCapture([], tooltips)
+
+        anchor_x, anchor_y = self.regions.bottom_right('E')
+        frame = self.frames.grab(rect=chart)
+        bars = [(chart[0] + x, height) for x, height in bar_heights(frame.crop(chart))]
+        bars = align_days(bars, anchor_x)
+        ex, ey, ew, eh = self.regions.rect('E')
+        calibrated = False
+        # E и C наводятся всегда — даже если на графике нашёлся один столбик или ни одного
+        for day in range(max(len(bars), len(DAY_KEYS))):
+            # нужное число дней и хотя бы один ненулевой столбик для масштаба
+            if day >= self.hover_days and (calibrated or day >= self.hover_days + 2):
+                break
+            key = day_key(day)
+            if key in DAY_KEYS:
+                point, region = self.regions.bottom_right(key), key
+            else:
+                dx = bars[-1 - day][0] - bars[-1][0]
+                point, region = (anchor_x + dx, anchor_y), (ex + dx, ey, ew, eh)
+            tooltips[key] = self._hover(point, region)
+            if day < len(bars) and bars[-1 - day][1] > 0:
+                calibrated = True
+        return HistoryCapture(bars, tooltips)
+
+    @staticmethod
+    def volumes(capture, values):
+        """Объёмы по дням из распознанных подсказок: values — {ключ дня: число}."""
+        exact = {}
+        for day in range(len(capture.tooltips)):
+            key = day_key(day)
+            if key in values:
+                exact[day] = values[key]
+        return daily_volumes(capture.bars, exact)
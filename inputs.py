@@ -0,0 +1,243 @@
+import ctypes
+import time
+
+CONFIRM_TIMEOUT = 0.5  # столько ждём, пока введённый текст появится в поле (пробные вводы)
+
+# ======================
+# Буфер обмена (Windows)
+# ======================
+CF_UNICODETEXT = 13
+GMEM_MOVEABLE = 0x0002
+
+def set_clipboard(text):
+    """Кладёт текст в буфер обмена Windows через WinAPI (без лишних зависимостей)."""
+    if not hasattr(ctypes, 'windll'):
+        raise OSError("Буфер обмена доступен только в Windows.")
+    user32, kernel32 = ctypes.windll.user32, ctypes.windll.kernel32
+    kernel32.GlobalAlloc.restype = ctypes.c_void_p
+    kernel32.GlobalLock.argtypes = [ctypes.c_void_p]
+    kernel32.GlobalLock.restype = ctypes.c_void_p
+    kernel32.GlobalUnlock.argtypes = [ctypes.c_void_p]
+    user32.SetClipboardData.argtypes = [ctypes.c_uint, ctypes.c_void_p]
+
+    data = ctypes.create_unicode_buffer(text)
+    size = ctypes.sizeof(data)
+    if not user32.OpenClipboard(None):
+        raise OSError("Не удалось открыть буфер обмена.")
+    try:
+        user32.EmptyClipboard()
+        handle = kernel32.GlobalAlloc(GMEM_MOVEABLE, size)
+        pointer = kernel32.GlobalLock(handle)
+        ctypes.memmove(pointer, data, size)
+        kernel32.GlobalUnlock(handle)
+        if not user32.SetClipboardData(CF_UNICODETEXT, handle):
+            raise OSError("Не удалось записать в буфер обмена.")
+    finally:
+        user32.CloseClipboard()
+
+
+# ======================
+# Способы ввода
+# ======================
+class DirectInput:
+    """Как раньше: клик pyautogui, ctrl+a/backspace, каждый символ — отдельный press.
+
+    pyautogui и pydirectinput делают паузу PAUSE (0.1 с) после каждого
+    вызова, поэтому длинный запрос вводится медленно.
+    """
+
+    name = 'direct'
+
+    def __init__(self):
+        import pyautogui
+        import pydirectinput
+        self._pyautogui = pyautogui
+        self._pydirectinput = pydirectinput
+
+    def click(self, x, y):
+        self._pyautogui.click(x, y)
+
+    def move(self, x, y):
+        self._pyautogui.moveTo(x, y)
+
+    def clear(self):
+        self._pyautogui.hotkey('ctrl', 'a')
+        self._pyautogui.press('backspace')
+
+    def type_text(self, text):
+        for char in text:
+            self._pydirectinput.press(char)
+
+    def enter(self, field, text):
+        """Очищает поле, в котором стоит курсор, и вводит text."""
+        self.clear()
+        self.type_text(text)
+
+
+class BatchedInput(DirectInput):
+    """Нажатия подряд без встроенной паузы библиотек, с настраиваемой задержкой между клавишами."""
+
+    name = 'batched'
+
+    def __init__(self, delay=0.005):
+        super().__init__()
+        self.delay = delay
+
+    def clear(self):
+        self._pyautogui.hotkey('ctrl', 'a', _pause=False)
+        self._pyautogui.press('backspace', _pause=False)
+        time.sleep(self.delay)
+
+    def type_text(self, text):
+        for char in text:
+            self._pydirectinput.press(char, _pause=False)
+            time.sleep(self.delay)
+
+
+class ClipboardInput(BatchedInput):
+    """Вставка текста целиком через буфер обмена (ctrl+v) — там, где игра её принимает."""
+
+    name = 'clipboard'
+
+    def type_text(self, text):
+        set_clipboard(text)
+        self._pyautogui.hotkey('ctrl', 'v', _pause=False)
+        time.sleep(self.delay)
+
+
+class RecordingInput:
+    """Ничего не нажимает — только записывает события (для проверок без игры)."""
+
+    name = 'recording'
+
+    def __init__(self):
+        self.events = []
+
+    def _log(self, kind, *args):
+        self.events.append((time.monotonic(), kind) + args)
+
+    def click(self, x, y):
+        self._log('click', x, y)
+
+    def move(self, x, y):
+        self._log('move', x, y)
+
+    def clear(self):
+        self._log('clear')
+
+    def type_text(self, text):
+        self._log('type', text)
+
+    def enter(self, field, text):
+        self._log('enter', field, text)
+
+    def typed(self, field=None):
+        """Тексты, введённые в поле (или во все поля)."""
+        return [e[3] for e in self.events if e[1] == 'enter' and field in (None, e[2])]
+
+
+# ======================
+# Выбор способа по полю
+# ======================
+class FieldInput:
+    """Ввод по полям A/F/G с замером времени каждого способа.
+
+    backends — {имя: способ ввода}; modes — {поле: (допустимые имена)},
+    для поля без записи допустимы все. Первые trials вводов в каждое поле
+    способы чередуются, дальше используется самый быстрый из тех, что не
+    давали ошибок. Способ, упавший с ошибкой, сразу заменяется следующим.
+    Клики и наведение идут через первый способ из backends.
+
+    Вставка без ошибки ещё не значит, что игра приняла текст (ctrl+v
+    молча игнорируется). С waiter (ScreenWaiter) пробные вводы проверяются:
+    после очистки снимается поле, после ввода оно должно измениться за
+    confirm_timeout — иначе это ошибка способа и ввод повторяется следующим.
+    Последний из допустимых способов поля (или единственный) — запасной и
+    не проверяется. Без waiter проверки нет, поэтому вставку стоит
+    разрешать только полям, где она проверена вручную.
+    """
+
+    name = 'auto'
+
+    def __init__(self, backends, modes=None, trials=3, waiter=None, confirm_timeout=CONFIRM_TIMEOUT):
+        self.backends = dict(backends)
+        self.modes = dict(modes or {})
+        self.trials = trials
+        self.waiter = waiter
+        self.confirm_timeout = confirm_timeout
+        self.pointer = next(iter(self.backends.values()))
+        self.stats = {}   # (поле, способ) -> [вводов, секунд, ошибок]
+
+    def click(self, x, y):
+        self.pointer.click(x, y)
+
+    def move(self, x, y):
+        self.pointer.move(x, y)
+
+    def _stat(self, field, mode):
+        return self.stats.setdefault((field, mode), [0, 0.0, 0])
+
+    def candidates(self, field):
+        allowed = self.modes.get(field) or tuple(self.backends)
+        return [mode for mode in allowed if mode in self.backends]
+
+    def mode_for(self, field):
+        """Способ для очередного ввода в поле."""
+        reliable = [m for m in self.candidates(field) if self._stat(field, m)[2] == 0]
+        if not reliable:
+            return self.candidates(field)[-1]
+        untried = [m for m in reliable if self._stat(field, m)[0] < self.trials]
+        if untried:
+            return min(untried, key=lambda m: self._stat(field, m)[0])
+        return min(reliable, key=lambda m: self._stat(field, m)[1] / self._stat(field, m)[0])
+
+    def _confirmed_enter(self, backend, field, text):
+        """Ввод с проверкой, что поле изменилось; False — текст не появился."""
+        backend.clear()
+        # снимок — когда очистка уже дорисовалась
+        self.waiter.until_stable(field, self.confirm_timeout)
+        before = self.waiter.snapshot(field)
+        backend.type_text(text)
+        if before is None:
+            return True
+        _, changed = self.waiter.until_changed(field, before, self.confirm_timeout)
+        return changed
+
+    def enter(self, field, text):
+        first = self.mode_for(field)
+        order = [first] + [m for m in self.candidates(field) if m != first]
+        baseline = self.candidates(field)[-1]
+        for mode in order:
+            stat = self._stat(field, mode)
+            start = time.perf_counter()
+            # проверяются только способы, которым есть замена: последний из
+            # допустимых (посимвольный ввод) вводит без проверки — то же число
+            # в поле выглядит «без изменений», а ввод при этом верный
+            confirm = self.waiter is not None and stat[0] < self.trials and mode != baseline
+            try:
+                if confirm:
+                    if not self._confirmed_enter(self.backends[mode], field, text):
+                        raise RuntimeError("текст не появился в поле")
+                else:
+                    self.backends[mode].enter(field, text)
+            except Exception as e:
+                stat[2] += 1
+                print(f"⚠️ Ввод в {field} способом '{mode}' не удался: {e}")
+                continue
+            stat[0] += 1
+            stat[1] += time.perf_counter() - start
+            return mode
+        raise RuntimeError(f"Не удалось ввести текст в поле {field} ни одним способом.")
+
+    def report(self):
+        lines = []
+        for field in sorted({f for f, _ in self.stats}):
+            parts = []
+            for mode in self.candidates(field):
+                count, total, errors = self._stat(field, mode)
+                if count:
+                    parts.append(f"{mode} {total / count * 1000:.0f} мс")
+                elif errors:
+                    parts.append(f"{mode} ошибка")
+            lines.append(f"⌨️ Поле {field}: {', '.join(parts)} → {self.mode_for(field)}")
+        return "\n".join(lines)
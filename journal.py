@@ -0,0 +1,127 @@
+import json
+import os
+import sys
+import threading
+import time
+from collections import namedtuple
+
+# ======================
+# Константы
+# ======================
+JOURNAL_FILE = "scan_journal.jsonl"
+SYNC_EVERY = 10        # fsync после стольких предметов (между ними — только flush)
+
+JournalState = namedtuple('JournalState', 'started item_ids results finished')
+
+# ======================
+# Журнал прогона
+# ======================
+class ScanJournal:
+    """Журнал прогона на диске: только дописывание, по строке JSON на событие.
+
+    Первая строка — список предметов прогона, затем по строке на каждый
+    готовый предмет (результат сканера), в конце — отметка завершения.
+    Каждая строка сразу сбрасывается в ОС (падение процесса ничего не
+    теряет), fsync — пачками по sync_every (при отключении питания теряется
+    не больше пачки). Потокобезопасен: результаты приходят из потоков
+    конвейера и клиентов.
+    """
+
+    def __init__(self, path=JOURNAL_FILE, sync_every=SYNC_EVERY):
+        self.path = path
+        self.sync_every = sync_every
+        self._file = None
+        self._unsynced = 0
+        self._lock = threading.Lock()
+
+    def start(self, items):
+        """Новый прогон: журнал перезаписывается списком предметов."""
+        self._file = open(self.path, 'w', encoding='utf-8')
+        self._write({'run': {'started': time.time(), 'items': [item.id for item in items]}}, sync=True)
+
+    def resume(self):
+        """Продолжение прерванного прогона: дописываем в тот же журнал."""
+        torn = False
+        with open(self.path, 'rb') as f:
+            if f.seek(0, os.SEEK_END) > 0:
+                f.seek(-1, os.SEEK_END)
+                torn = f.read(1) != b"\n"
+        self._file = open(self.path, 'a', encoding='utf-8')
+        if torn:
+            # недописанная при падении строка — новые записи с новой строки
+            self._file.write("\n")
+
+    def _write(self, record, sync=False):
+        with self._lock:
+            if self._file is None:
+                return
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+            self._file.flush()
+            self._unsynced += 1
+            if sync or self._unsynced >= self.sync_every:
+                os.fsync(self._file.fileno())
+                self._unsynced = 0
+
+    def record(self, result):
+        """result — (item_id, buy, sale, lastday, last2day) из Scanner.on_item_done (ордер уже выставлен)."""
+        self._write({'item': result[0], 'result': list(result)})
+
+    def close(self, finished):
+        """finished=False — прогон прерван, при следующем запуске предложим продолжить."""
+        if finished:
+            self._write({'finished': time.time()}, sync=True)
+        with self._lock:
+            file, self._file = self._file, None
+        if file is not None:
+            file.flush()
+            os.fsync(file.fileno())
+            file.close()
+
+
+def load_journal(path=JOURNAL_FILE):
+    """JournalState из журнала или None, если журнала нет.
+
+    Недописанная последняя строка (падение посреди записи) пропускается.
+    """
+    try:
+        f = open(path, 'r', encoding='utf-8')
+    except FileNotFoundError:
+        return None
+    started, item_ids, results, finished = None, [], {}, False
+    with f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if 'run' in record:
+                started, item_ids = record['run']['started'], record['run']['items']
+                results, finished = {}, False
+            elif 'item' in record:
+                results[record['item']] = tuple(record['result'])
+            elif 'finished' in record:
+                finished = True
+    if started is None:
+        return None
+    return JournalState(started, item_ids, list(results.values()), finished)
+
+def interrupted_run(path=JOURNAL_FILE):
+    """Состояние прерванного прогона, который есть смысл продолжить, иначе None."""
+    state = load_journal(path)
+    if state is None or state.finished or len(state.results) >= len(state.item_ids):
+        return None
+    return state
+
+def remaining_ids(state):
+    done = {result[0] for result in state.results}
+    return [item_id for item_id in state.item_ids if item_id not in done]
+
+
+if __name__ == "__main__":
+    state = load_journal(sys.argv[1] if len(sys.argv) > 1 else JOURNAL_FILE)
+    if state is None:
+        print("Журнала нет")
+    else:
+        status = "завершён" if state.finished else "прерван"
+        print(f"Прогон от {time.strftime('%Y-%m-%d %H:%M', time.localtime(state.started))}: {status}, "
+              f"готово {len(state.results)} из {len(state.item_ids)}")
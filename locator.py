@@ -0,0 +1,271 @@
+import time
+from collections import namedtuple
+
+import numpy as np
+from PIL import Image
+
+from capture import to_gray
+
+# Как pyautogui.Box — код, читающий location.left/.top, не меняется
+Box = namedtuple('Box', 'left top width height')
+
+# ======================
+# Нормированная корреляция (как TM_CCOEFF_NORMED) через FFT
+# ======================
+def fast_len(n):
+    """Ближайшая сверху длина вида 2^a·3^b·5^c — на ней FFT быстрее всего."""
+    while True:
+        m = n
+        for p in (2, 3, 5):
+            while m % p == 0:
+                m //= p
+        if m == 1:
+            return n
+        n += 1
+
+def downscale(a):
+    """Уменьшение в 2 раза средним по блокам 2×2."""
+    h, w = a.shape[0] // 2 * 2, a.shape[1] // 2 * 2
+    return a[:h, :w].reshape(h // 2, 2, w // 2, 2).mean(axis=(1, 3))
+
+
+class Haystack:
+    """Серое изображение, подготовленное для поиска шаблонов.
+
+    FFT изображения и интегральные суммы считаются один раз; каждый
+    следующий шаблон стоит только своего FFT и одного обратного преобразования.
+    """
+
+    def __init__(self, gray):
+        self.image = np.asarray(gray, dtype=np.float32)
+        self.height, self.width = self.image.shape
+        self.fft_shape = (fast_len(self.height), fast_len(self.width))
+        self.fft = np.fft.rfft2(self.image, s=self.fft_shape)
+        pad = np.pad(self.image.astype(np.float64), ((1, 0), (1, 0)))
+        self._sum = pad.cumsum(0).cumsum(1)
+        self._sq = (pad * pad).cumsum(0).cumsum(1)
+
+    def _window(self, table, h, w):
+        return table[h:, w:] - table[:-h, w:] - table[h:, :-w] + table[:-h, :-w]
+
+    def ncc(self, template):
+        """Карта корреляции для всех положений шаблона целиком внутри изображения."""
+        return self.ncc_many([template])[0]
+
+    def ncc_many(self, templates):
+        """Карты корреляции для нескольких шаблонов.
+
+        Все шаблоны проходят одним пакетным FFT и одним обратным; спектр
+        изображения и интегральные суммы общие.
+        """
+        out = [np.zeros((0, 0), dtype=np.float32)] * len(templates)
+        fits = [i for i, t in enumerate(templates) if t.shape[0] <= self.height and t.shape[1] <= self.width]
+        if not fits:
+            return out
+        stack = np.zeros((len(fits),) + self.fft_shape, dtype=np.float32)
+        norms = []
+        for k, i in enumerate(fits):
+            t = templates[i]
+            centered = t - t.mean()
+            stack[k, :t.shape[0], :t.shape[1]] = centered
+            norms.append(np.sqrt((centered * centered).sum()))
+        spectra = self.fft[None] * np.conj(np.fft.rfft2(stack, axes=(-2, -1)))
+        corr = np.fft.irfft2(spectra, s=self.fft_shape, axes=(-2, -1))
+
+        stds = {}
+        for k, i in enumerate(fits):
+            h, w = templates[i].shape
+            if (h, w) not in stds:
+                s1 = self._window(self._sum, h, w)
+                var = self._window(self._sq, h, w) - s1 * s1 / (h * w)
+                stds[(h, w)] = np.sqrt(np.maximum(var, 0))
+            den = stds[(h, w)] * norms[k]
+            num = corr[k, :self.height - h + 1, :self.width - w + 1]
+            out[i] = np.where(den > 1e-6, num / np.maximum(den, 1e-6), 0).astype(np.float32)
+        return out
+
+
+def ncc_at(image, template):
+    """Корреляция одного окна того же размера, что и шаблон."""
+    a = image - image.mean()
+    t = template - template.mean()
+    den = np.sqrt((a * a).sum() * (t * t).sum())
+    return float((a * t).sum() / den) if den > 1e-6 else 0.0
+
+def peaks(scores, threshold, size, limit):
+    """До limit лучших положений выше порога, не ближе size друг к другу."""
+    scores = scores.copy()
+    found = []
+    h, w = size
+    while len(found) < limit and scores.size:
+        y, x = np.unravel_index(np.argmax(scores), scores.shape)
+        if scores[y, x] < threshold:
+            break
+        found.append((int(y), int(x)))
+        scores[max(0, y - h // 2):y + h // 2 + 1, max(0, x - w // 2):x + w // 2 + 1] = -1
+    return found
+
+
+# ======================
+# Поиск иконки предмета
+# ======================
+class IconTemplate:
+    """Иконка pic/{name}.png: цвет, серый и уменьшенные копии для грубого поиска."""
+
+    def __init__(self, path, levels):
+        with Image.open(path) as img:
+            self.rgb = np.asarray(img.convert('RGB'), dtype=np.float32)
+        self.path = path
+        self.height, self.width = self.rgb.shape[:2]
+        self.gray = to_gray(self.rgb.astype(np.uint8)).astype(np.float32)
+        self.mean_color = self.rgb.reshape(-1, 3).mean(axis=0)
+        self.pyramid = [self.gray]
+        for _ in range(levels):
+            self.pyramid.append(downscale(self.pyramid[-1]))
+
+
+class IconLocator:
+    """Быстрая замена pyautogui.locateOnScreen для иконок предметов.
+
+    - ищет только внутри области списка результатов (search_region из разметки;
+      если её нет — во всём кадре);
+    - грубый поиск на уменьшенной серой копии, уточнение в полном размере
+      только вокруг кандидатов;
+    - сначала проверяет место, где эта иконка была найдена в прошлый раз;
+    - укладывается в заданный бюджет времени.
+
+    Найденное место подтверждается по цвету: серый поиск не различает
+    тиры одного предмета, у которых отличается только цвет фона.
+    """
+
+    def __init__(self, regions=None, search_region='L', confidence=0.85, budget=1.0,
+                 min_coarse_side=12, candidates=8, max_color_shift=40):
+        self.regions = regions
+        self.search_region = search_region
+        self.confidence = confidence
+        self.budget = budget
+        self.min_coarse_side = min_coarse_side
+        self.candidates = candidates
+        self.max_color_shift = max_color_shift
+        self.last_hits = {}
+        self._templates = {}
+
+    def search_area(self):
+        """Прямоугольник поиска (x, y, w, h) или None — весь экран."""
+        if self.regions is None or self.search_region is None:
+            return None
+        try:
+            return self.regions.rect(self.search_region)
+        except (ValueError, FileNotFoundError):
+            return None
+
+    def template(self, path):
+        tpl = self._templates.get(path)
+        if tpl is None:
+            with Image.open(path) as img:
+                side = min(img.size)
+            levels = 0
+            while side // 2 >= self.min_coarse_side:
+                side //= 2
+                levels += 1
+            tpl = IconTemplate(path, levels)
+            self._templates[path] = tpl
+        return tpl
+
+    def _roi(self, frame):
+        area = self.search_area()
+        if area is None:
+            return frame.array, frame.origin
+        fx, fy, fw, fh = frame.rect
+        x0, y0 = max(area[0], fx), max(area[1], fy)
+        x1, y1 = min(area[0] + area[2], fx + fw), min(area[1] + area[3], fy + fh)
+        if x1 <= x0 or y1 <= y0:
+            return frame.array, frame.origin
+        return frame.crop((x0, y0, x1 - x0, y1 - y0)), (x0, y0)
+
+    def _verify(self, rgb, tpl, y, x):
+        """Цветная проверка положения: (совпадение, корреляция)."""
+        patch = rgb[y:y + tpl.height, x:x + tpl.width].astype(np.float32)
+        if patch.shape[:2] != (tpl.height, tpl.width):
+            return False, 0.0
+        shift = np.abs(patch.reshape(-1, 3).mean(axis=0) - tpl.mean_color).max()
+        score = np.mean([ncc_at(patch[..., c], tpl.rgb[..., c]) for c in range(3)])
+        return score >= self.confidence and shift <= self.max_color_shift, float(score)
+
+    def _refine(self, rgb, tpl, y, x, radius):
+        """Уточнение в полном размере в окне ±radius вокруг (y, x)."""
+        y0, x0 = max(0, y - radius), max(0, x - radius)
+        y1 = min(rgb.shape[0], y + radius + tpl.height)
+        x1 = min(rgb.shape[1], x + radius + tpl.width)
+        if y1 - y0 < tpl.height or x1 - x0 < tpl.width:
+            return None
+        window = to_gray(rgb[y0:y1, x0:x1]).astype(np.float32)
+        scores = Haystack(window).ncc(tpl.gray)
+        dy, dx = np.unravel_index(np.argmax(scores), scores.shape)
+        ok, score = self._verify(rgb, tpl, y0 + dy, x0 + dx)
+        return (score, y0 + dy, x0 + dx) if ok else None
+
+    def locate(self, frame, image_path, budget=None):
+        """Box в экранных координатах или None, если иконка не найдена за бюджет."""
+        return self.locate_many(frame, [image_path], budget)[image_path]
+
+    def locate_many(self, frame, image_paths, budget=None):
+        """Положения нескольких иконок по одному кадру: {путь: Box или None}.
+
+        Кадр переводится в серый и уменьшается один раз, его FFT общий для
+        всех шаблонов. Если две иконки претендуют на одно место, оно остаётся
+        за той, что совпала лучше.
+        """
+        deadline = time.perf_counter() + (self.budget if budget is None else budget)
+        rgb, (ox, oy) = self._roi(frame)
+        found = {}
+        pending = {}
+
+        # 1) места прошлых попаданий
+        for path in image_paths:
+            tpl = self.template(path)
+            hit = self.last_hits.get(path)
+            if hit is not None:
+                refined = self._refine(rgb, tpl, hit[1] - oy, hit[0] - ox, 3)
+                if refined:
+                    found[path] = refined
+                    continue
+            pending.setdefault(len(tpl.pyramid) - 1, []).append((path, tpl))
+
+        # 2) грубый поиск: один Haystack на уровень пирамиды, все шаблоны уровня разом
+        if pending:
+            coarse = {0: to_gray(rgb).astype(np.float32)}
+            for level in range(1, max(pending) + 1):
+                coarse[level] = downscale(coarse[level - 1])
+            for levels, group in sorted(pending.items()):
+                maps = Haystack(coarse[levels]).ncc_many([tpl.pyramid[-1] for _, tpl in group])
+                slack = 0.15 if levels else 0.0
+                factor = 2 ** levels
+                for (path, tpl), scores in zip(group, maps):
+                    best = None
+                    for cy, cx in peaks(scores, self.confidence - slack, tpl.pyramid[-1].shape, self.candidates):
+                        if time.perf_counter() > deadline:
+                            break
+                        # 3) уточнение вокруг кандидата
+                        refined = self._refine(rgb, tpl, cy * factor, cx * factor, factor + 2)
+                        if refined and (best is None or refined[0] > best[0]):
+                            best = refined
+                    if best:
+                        found[path] = best
+
+        # одно место — одна иконка
+        results = {path: None for path in image_paths}
+        taken = []
+        for path, (score, y, x) in sorted(found.items(), key=lambda item: -item[1][0]):
+            tpl = self.template(path)
+            if any(abs(y - ty) < tpl.height // 2 and abs(x - tx) < tpl.width // 2 for ty, tx in taken):
+                continue
+            taken.append((y, x))
+            results[path] = self._remember(path, tpl, (score, y, x), ox, oy)
+        return results
+
+    def _remember(self, image_path, tpl, found, ox, oy):
+        _, y, x = found
+        left, top = ox + int(x), oy + int(y)
+        self.last_hits[image_path] = (left, top)
+        return Box(left, top, tpl.width, tpl.height)
@@ -0,0 +1,592 @@
+import atexit
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+from PIL import Image, ImageOps
+
+from capture import to_gray
+
+# ======================
+# Константы
+# ======================
+DIGITS_WHITELIST = "0123456789"
+LINE_CONFIG = f"--psm 7 -c tessedit_char_whitelist={DIGITS_WHITELIST}"
+BLOCK_CONFIG = f"--psm 6 -c tessedit_char_whitelist={DIGITS_WHITELIST}"
+GLYPHS_FILE = "glyphs.npz"
+OCR_CACHE_FILE = "ocr_cache.json"
+OCR_CACHE_SIZE = 4096
+
+# Вид поля: полоска цены или подсказка объёма
+FIELD_KINDS = {'D': 'price', 'D1': 'price', 'E': 'volume', 'C': 'volume'}
+
+def field_kind(region_name):
+    """Тип поля; E2, E3, ... — подсказки более ранних дней графика, как E."""
+    kind = FIELD_KINDS.get(region_name)
+    return kind if kind else FIELD_KINDS[region_name.rstrip('0123456789')]
+
+# ======================
+# Подготовка вырезок
+# ======================
+class PreprocessProfile:
+    """Параметры подготовки вырезки: инверсия, увеличение, порог.
+
+    Инверсия и порог сведены в одну таблицу на 256 значений, которая
+    применяется после увеличения (инверсия перестановочна с ресэмплингом).
+    """
+
+    def __init__(self, invert, scale, threshold, resample=Image.Resampling.LANCZOS):
+        self.invert = invert
+        self.scale = scale
+        self.threshold = threshold
+        self.resample = resample
+        levels = np.arange(256)
+        if invert:
+            levels = 255 - levels
+        self.mask_lut = levels > threshold
+        self.lut = np.where(self.mask_lut, 255, 0).astype(np.uint8).tolist()
+
+
+# Полоска цены (D/D1): серый → x2 → порог 128
+# Подсказка объёма (C/E): серый → инверсия → x4 → порог 180
+# Увеличение — LANCZOS, как в старой цепочке. Другой фильтр — только после того,
+# как bench/bench_preprocess.py покажет на вырезках ту же точность tesseract
+PROFILES = {
+    'price': PreprocessProfile(invert=False, scale=2, threshold=128),
+    'volume': PreprocessProfile(invert=True, scale=4, threshold=180),
+}
+
+def preprocess(crop, profile):
+    """Вырезка для tesseract: серый → увеличение → инверсия и порог одной таблицей."""
+    img = crop.convert('L') if isinstance(crop, Image.Image) else Image.fromarray(to_gray(crop))
+    if profile.scale != 1:
+        img = img.resize((img.width * profile.scale, img.height * profile.scale), profile.resample)
+    return img.point(profile.lut)
+
+def prepare_price(img):
+    return preprocess(img, PROFILES['price'])
+
+def prepare_volume(img):
+    return preprocess(img, PROFILES['volume'])
+
+def binarize(crop, kind):
+    """Маска цифр в исходном масштабе: True — пиксель цифры."""
+    return PROFILES[kind].mask_lut[to_gray(crop)]
+
+# ======================
+# Разбор текста
+# ======================
+def parse_price(text, region_name):
+    cleaned = re.sub(r'[^0-9]', '', text.strip())
+    if not cleaned:
+        raise ValueError(f"Не удалось распознать число в области {region_name}: '{text}'")
+    return int(cleaned)
+
+def parse_volume(text, region_name):
+    numbers = re.findall(r'\d+', text)
+    if not numbers:
+        raise ValueError(f"Не удалось распознать число в области {region_name}: '{text}'")
+    return int(numbers[0])
+
+# ======================
+# Движки OCR
+# ======================
+class PytesseractEngine:
+    """Исходное поведение: отдельный процесс tesseract на каждую вырезку."""
+
+    name = "pytesseract"
+
+    def __init__(self):
+        import pytesseract
+        self._pytesseract = pytesseract
+
+    def read(self, images):
+        return [self._pytesseract.image_to_string(img, config=LINE_CONFIG) for img in images]
+
+    def close(self):
+        pass
+
+
+class BatchPytesseractEngine(PytesseractEngine):
+    """Один процесс tesseract на пачку: вырезки склеиваются в столбик.
+
+    Каждая вырезка приводится к тёмным цифрам на белом фоне и читается как
+    отдельная строка блока (--psm 6). Если число строк не совпало с числом
+    вырезок, пачка перечитывается по одной.
+    """
+
+    name = "pytesseract-batch"
+    gap = 24
+
+    def _stack(self, images):
+        lines = []
+        for img in images:
+            img = img.convert('L')
+            # фон определяем по краям — он должен стать белым
+            a = np.asarray(img)
+            edges = np.concatenate([a[0], a[-1], a[:, 0], a[:, -1]])
+            if edges.mean() < 128:
+                img = ImageOps.invert(img)
+            lines.append(img)
+        width = max(img.width for img in lines) + 2 * self.gap
+        height = sum(img.height for img in lines) + self.gap * (len(lines) + 1)
+        sheet = Image.new('L', (width, height), 255)
+        y = self.gap
+        for img in lines:
+            sheet.paste(img, (self.gap, y))
+            y += img.height + self.gap
+        return sheet
+
+    def read(self, images):
+        if len(images) <= 1:
+            return super().read(images)
+        text = self._pytesseract.image_to_string(self._stack(images), config=BLOCK_CONFIG)
+        lines = [line for line in text.splitlines() if line.strip()]
+        if len(lines) != len(images):
+            return super().read(images)
+        return lines
+
+
+class TesserocrEngine:
+    """Тёплый дескриптор tesseract внутри процесса (пакет tesserocr).
+
+    Модель языка загружается один раз; на каждую вырезку — только SetImage
+    и распознавание, без запуска процесса.
+    """
+
+    name = "tesserocr"
+
+    def __init__(self, lang="eng"):
+        import tesserocr
+        self._api = tesserocr.PyTessBaseAPI(lang=lang, psm=tesserocr.PSM.SINGLE_LINE)
+        self._api.SetVariable("tessedit_char_whitelist", DIGITS_WHITELIST)
+        self._lock = threading.Lock()
+
+    def read(self, images):
+        texts = []
+        with self._lock:
+            for img in images:
+                self._api.SetImage(img)
+                texts.append(self._api.GetUTF8Text())
+        return texts
+
+    def close(self):
+        with self._lock:
+            self._api.End()
+
+
+# ======================
+# Цифры по шаблонам глифов
+# ======================
+def connected_components(mask):
+    """Компоненты 8-связности маски по отрезкам строк.
+
+    Возвращает список (x0, y0, x1, y1), правая и нижняя границы — исключительно.
+    """
+    h, w = mask.shape
+    padded = np.zeros((h, w + 2), dtype=np.int8)
+    padded[:, 1:-1] = mask
+    d = np.diff(padded, axis=1)
+    rows, starts = np.nonzero(d == 1)
+    _, ends = np.nonzero(d == -1)
+    n = len(rows)
+    if n == 0:
+        return []
+
+    parent = list(range(n))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    rows_l, starts_l, ends_l = rows.tolist(), starts.tolist(), ends.tolist()
+    prev_begin = prev_end = 0    # отрезки предыдущей строки: [prev_begin, prev_end)
+    i = 0
+    while i < n:
+        row = rows_l[i]
+        j = i
+        while j < n and rows_l[j] == row:
+            j += 1
+        if prev_end > prev_begin and rows_l[prev_begin] != row - 1:
+            prev_begin = prev_end = i
+        for k in range(i, j):
+            for m in range(prev_begin, prev_end):
+                if starts_l[m] <= ends_l[k] and ends_l[m] >= starts_l[k]:
+                    a, b = find(k), find(m)
+                    if a != b:
+                        parent[a] = b
+        prev_begin, prev_end = i, j
+        i = j
+
+    roots = np.array([find(k) for k in range(n)])
+    labels, inverse = np.unique(roots, return_inverse=True)
+    x0 = np.full(len(labels), w)
+    y0 = np.full(len(labels), h)
+    x1 = np.zeros(len(labels), dtype=int)
+    y1 = np.zeros(len(labels), dtype=int)
+    np.minimum.at(x0, inverse, starts)
+    np.minimum.at(y0, inverse, rows)
+    np.maximum.at(x1, inverse, ends)
+    np.maximum.at(y1, inverse, rows + 1)
+    return list(zip(x0.tolist(), y0.tolist(), x1.tolist(), y1.tolist()))
+
+def glyph_boxes(mask, min_height_ratio=0.6):
+    """Рамки цифр слева направо.
+
+    Куски одной цифры, перекрывающиеся по столбцам, склеиваются; мелкие
+    компоненты (запятые, точки, шум) отбрасываются.
+    """
+    boxes = sorted(connected_components(mask))
+    merged = []
+    for box in boxes:
+        if merged:
+            x0, y0, x1, y1 = merged[-1]
+            overlap = min(x1, box[2]) - max(x0, box[0])
+            if overlap > 0 and overlap * 2 >= min(x1 - x0, box[2] - box[0]):
+                merged[-1] = (min(x0, box[0]), min(y0, box[1]), max(x1, box[2]), max(y1, box[3]))
+                continue
+        merged.append(box)
+    if not merged:
+        return []
+    tallest = max(y1 - y0 for _, y0, _, y1 in merged)
+    return [b for b in merged if b[3] - b[1] >= tallest * min_height_ratio]
+
+
+class GlyphRecognizer:
+    """Распознавание цифр игрового шрифта по шаблонам.
+
+    Каждая цифра вырезается по своей рамке, приводится к размеру шаблона с
+    сохранением пропорций и сравнивается сразу со всеми шаблонами одной
+    операцией NumPy. Уверенность цифры — доля совпавших пикселей лучшего
+    шаблона; если она ниже min_confidence или второй шаблон почти так же
+    хорош, поле считается ненадёжным.
+    """
+
+    size = (16, 12)
+
+    def __init__(self, templates, labels, min_confidence=0.85, min_margin=0.04):
+        self.templates = np.asarray(templates, dtype=np.float32)
+        self.labels = list(labels)
+        self.digits = sorted(set(self.labels))
+        # номер цифры для каждого шаблона — для максимума по цифре
+        self._digit_index = np.array([self.digits.index(label) for label in self.labels])
+        self.min_confidence = min_confidence
+        self.min_margin = min_margin
+
+    @classmethod
+    def normalize(cls, mask, box):
+        x0, y0, x1, y1 = box
+        glyph = mask[y0:y1, x0:x1]
+        gh, gw = glyph.shape
+        th, tw = cls.size
+        scale = th / gh
+        nw = max(1, min(tw, round(gw * scale)))
+        rows = np.minimum((np.arange(th) / scale).astype(int), gh - 1)
+        cols = np.minimum((np.arange(nw) * gw / nw).astype(int), gw - 1)
+        out = np.zeros(cls.size, dtype=np.float32)
+        left = (tw - nw) // 2
+        out[:, left:left + nw] = glyph[np.ix_(rows, cols)]
+        return out
+
+    @classmethod
+    def from_samples(cls, samples, per_digit=8, **kwargs):
+        """Шаблоны из подписанных масок: [(маска, "12345")].
+
+        На каждую цифру хранится до per_digit различных образцов — цифры
+        полоски цены и подсказки объёма рисуются немного по-разному.
+        """
+        glyphs = {}
+        for mask, text in samples:
+            digits = re.sub(r'[^0-9]', '', text)
+            boxes = glyph_boxes(mask)
+            if len(boxes) != len(digits):
+                continue        # сегментация не совпала с подписью — образец пропускаем
+            for digit, box in zip(digits, boxes):
+                known = glyphs.setdefault(digit, [])
+                glyph = cls.normalize(mask, box)
+                if len(known) < per_digit and not any(np.array_equal(glyph, g) for g in known):
+                    known.append(glyph)
+        if not glyphs:
+            raise ValueError("Ни один образец не подошёл для построения шаблонов.")
+        labels, templates = [], []
+        for digit in sorted(glyphs):
+            labels.extend(digit * len(glyphs[digit]))
+            templates.extend(glyphs[digit])
+        return cls(templates, labels, **kwargs)
+
+    @classmethod
+    def load(cls, path=GLYPHS_FILE, **kwargs):
+        data = np.load(path)
+        return cls(data['templates'], [str(d) for d in data['labels']], **kwargs)
+
+    def save(self, path=GLYPHS_FILE):
+        np.savez_compressed(path, templates=self.templates, labels=np.array(self.labels))
+
+    def recognize(self, mask):
+        """Возвращает (текст, уверенности цифр). Числа, разделённые широким
+        промежутком, разделяются пробелом."""
+        boxes = glyph_boxes(mask)
+        if not boxes:
+            return "", []
+        glyphs = np.stack([self.normalize(mask, box) for box in boxes])
+        # (цифры, шаблоны): доля совпавших пикселей → лучший шаблон каждой цифры
+        template_scores = 1.0 - np.abs(glyphs[:, None] - self.templates[None]).mean(axis=(2, 3))
+        scores = np.zeros((len(boxes), len(self.digits)), dtype=np.float32)
+        np.maximum.at(scores.T, self._digit_index, template_scores.T)
+        order = np.argsort(scores, axis=1)
+        best = order[:, -1]
+        rows = np.arange(len(boxes))
+        best_scores = scores[rows, best]
+        second_scores = scores[rows, order[:, -2]] if len(self.digits) > 1 else np.zeros(len(boxes))
+        # почти равные варианты — цифра ненадёжна
+        confidences = np.where(best_scores - second_scores < self.min_margin,
+                               best_scores * 0.5, best_scores)
+
+        width = np.median([x1 - x0 for x0, _, x1, _ in boxes])
+        text = self.digits[best[0]]
+        for k in range(1, len(boxes)):
+            if boxes[k][0] - boxes[k - 1][2] > width * 1.5:
+                text += " "
+            text += self.digits[best[k]]
+        return text, confidences.tolist()
+
+    def is_confident(self, confidences):
+        return bool(confidences) and min(confidences) >= self.min_confidence
+
+
+# ======================
+# Кэш распознанных вырезок
+# ======================
+def crop_key(kind, mask):
+    """Быстрый отпечаток бинаризованной вырезки: вид поля, размер и биты маски."""
+    digest = hashlib.blake2b(np.packbits(mask).tobytes(), digest_size=12)
+    digest.update(f"{kind}:{mask.shape[0]}x{mask.shape[1]}".encode())
+    return digest.hexdigest()
+
+
+class OcrCache:
+    """Ограниченный LRU-кэш: отпечаток маски → распознанное число.
+
+    Одни и те же цены и объёмы часто рисуются теми же пикселями (цена не
+    изменилась с прошлого прогона, повторяющиеся подсказки) — попадание
+    пропускает и шаблоны, и tesseract. Сохраняется на диск между
+    прогонами; потокобезопасен (OCR идёт в потоках конвейера).
+    """
+
+    def __init__(self, max_size=OCR_CACHE_SIZE, path=None):
+        self.max_size = max_size
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def load(cls, path=OCR_CACHE_FILE, **kwargs):
+        cache = cls(path=path, **kwargs)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+        except FileNotFoundError:
+            return cache
+        except (OSError, ValueError) as e:
+            print(f"⚠️ Кэш OCR {path} не прочитан: {e} → начинаем с пустого")
+            return cache
+        for key, value in entries[-cache.max_size:]:
+            cache._entries[key] = value
+        return cache
+
+    def get(self, key):
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def save(self, path=None):
+        path = path or self.path
+        if not path:
+            return
+        with self._lock:
+            entries = list(self._entries.items())
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entries, f)
+        os.replace(tmp_path, path)
+
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def report(self):
+        return (
+            f"🗂 Кэш OCR: {self.hits} попаданий из {self.hits + self.misses} "
+            f"({self.hit_rate():.0%}), записей {len(self._entries)}"
+        )
+
+    def __len__(self):
+        return len(self._entries)
+
+
+# ======================
+# Чтение полей предмета
+# ======================
+FIELD_PARSE = {'price': parse_price, 'volume': parse_volume}
+
+
+class FieldReader:
+    """Числа полей D/D1/C/E: сначала кэш распознанных вырезок, затем шаблоны
+    глифов, ненадёжные поля — одним вызовом движка tesseract."""
+
+    def __init__(self, engine=None, glyphs=None, cache=None):
+        self.engine = engine
+        self.glyphs = glyphs
+        self.cache = cache
+        self.glyph_hits = 0
+        self.fallbacks = 0
+
+    def read(self, crops, timings=None):
+        """crops: {область: вырезка (PIL или RGB-массив)}.
+
+        Возвращает (значения, ошибки): {область: число}, {область: исключение}.
+        timings — необязательный dict, куда пишется время (с) на каждое поле;
+        общий вызов tesseract делится поровну между его полями.
+        """
+        values, errors, pending, spent, keys = {}, {}, {}, {}, {}
+        for region_name, crop in crops.items():
+            started = time.perf_counter()
+            kind = field_kind(region_name)
+            mask = binarize(crop, kind) if self.glyphs is not None or self.cache is not None else None
+            if self.cache is not None:
+                keys[region_name] = crop_key(kind, mask)
+                cached = self.cache.get(keys[region_name])
+                if cached is not None:
+                    values[region_name] = cached
+                    spent[region_name] = time.perf_counter() - started
+                    continue
+            if self.glyphs is not None:
+                text, confidences = self.glyphs.recognize(mask)
+                if self.glyphs.is_confident(confidences):
+                    try:
+                        values[region_name] = FIELD_PARSE[kind](text, region_name)
+                        self.glyph_hits += 1
+                        if self.cache is not None:
+                            self.cache.put(keys[region_name], values[region_name])
+                        spent[region_name] = time.perf_counter() - started
+                        continue
+                    except ValueError:
+                        pass
+            pending[region_name] = crop
+            spent[region_name] = time.perf_counter() - started
+
+        if pending:
+            started = time.perf_counter()
+            self._read_pending(pending, values, errors)
+            share = (time.perf_counter() - started) / len(pending)
+            for region_name in pending:
+                spent[region_name] += share
+                if self.cache is not None and region_name in values:
+                    self.cache.put(keys[region_name], values[region_name])
+        if timings is not None:
+            timings.update(spent)
+        return values, errors
+
+    def _read_pending(self, pending, values, errors):
+        """Поля, где шаблоны не уверены, — одним вызовом движка."""
+        if self.engine is None:
+            for region_name in pending:
+                errors[region_name] = ValueError(f"Нет движка OCR для области {region_name}")
+            return
+        self.fallbacks += len(pending)
+        images = []
+        for region_name, crop in pending.items():
+            images.append(preprocess(crop, PROFILES[field_kind(region_name)]))
+        try:
+            texts = self.engine.read(images)
+        except Exception as e:
+            for region_name in pending:
+                errors[region_name] = e
+            return
+        for region_name, text in zip(pending, texts):
+            try:
+                values[region_name] = FIELD_PARSE[field_kind(region_name)](text, region_name)
+            except ValueError as e:
+                errors[region_name] = e
+
+    def report(self):
+        lines = [f"🔢 OCR: шаблонами {self.glyph_hits}, через tesseract {self.fallbacks}"]
+        if self.cache is not None:
+            lines.append(self.cache.report())
+        return "\n".join(lines)
+
+
+def load_labeled_crops(folder):
+    """Подписанные вырезки {область}_{число}_{номер}.png → [(область, число, номер, RGB-массив)]."""
+    crops = []
+    for name in sorted(os.listdir(folder)):
+        if not name.lower().endswith('.png'):
+            continue
+        region_name, value, index = name[:-4].split('_')
+        with Image.open(os.path.join(folder, name)) as img:
+            crops.append((region_name, int(value), index, np.asarray(img.convert('RGB'))))
+    return crops
+
+
+def build_glyphs(folder, path=GLYPHS_FILE):
+    samples = [
+        (binarize(crop, FIELD_KINDS[region_name]), str(value))
+        for region_name, value, _, crop in load_labeled_crops(folder)
+    ]
+    recognizer = GlyphRecognizer.from_samples(samples)
+    recognizer.save(path)
+    print(f"✅ Шаблоны цифр {''.join(recognizer.digits)} ({len(recognizer.labels)} образцов) сохранены в {path}")
+    return recognizer
+
+
+def create_engine():
+    """Самый быстрый доступный движок: tesserocr, иначе пакетный pytesseract."""
+    try:
+        return TesserocrEngine()
+    except Exception as e:
+        print(f"⚠️ tesserocr недоступен ({e}) → пакетный pytesseract")
+        return BatchPytesseractEngine()
+
+
+def create_field_reader(glyphs_path=GLYPHS_FILE, cache_path=OCR_CACHE_FILE):
+    """FieldReader с шаблонами глифов, если они построены (python ocr.py build-glyphs ...),
+    и кэшем распознанных вырезок, который сохраняется при выходе (cache_path=None — без кэша)."""
+    glyphs = None
+    if os.path.exists(glyphs_path):
+        glyphs = GlyphRecognizer.load(glyphs_path)
+    else:
+        print(f"ℹ️ Шаблоны цифр {glyphs_path} не найдены — только tesseract")
+    cache = None
+    if cache_path:
+        cache = OcrCache.load(cache_path)
+        atexit.register(cache.save)
+    return FieldReader(create_engine(), glyphs, cache)
+
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 3 and sys.argv[1] == "build-glyphs":
+        build_glyphs(sys.argv[2], sys.argv[3] if len(sys.argv) > 3 else GLYPHS_FILE)
+    else:
+        print("Использование: python ocr.py build-glyphs <папка с вырезками> [glyphs.npz]")
@@ -0,0 +1,161 @@
+import math
+from collections import namedtuple
+from datetime import datetime, timezone
+
+from strategy import BuyStrategy, stored_to_screen
+
+# ======================
+# Константы
+# ======================
+FAR_MISS = 0.35        # насколько (в долях) цена или объём далеки от правила — «мимо с запасом»
+RECHECK_HOURS = 24     # «мимо с запасом» не сканируется, пока данные свежее этого
+AGE_HOURS = 12         # за столько часов вес предмета растёт вдвое — старые данные проверяем раньше
+
+# Свежесть: данные моложе срока не пересканируются; у изменчивых цен срок короче
+FRESH_HOURS = 6
+MIN_FRESH_HOURS = 1
+VOLATILITY_WEIGHT = 10  # коэффициент вариации 0.1 → срок вдвое короче
+VOLATILITY_DAYS = 7
+
+ScanPlan = namedtuple('ScanPlan', 'items skipped fresh')
+# Правило по умолчанию — если план строится без STRATEGY из bot.py
+DEFAULT_STRATEGY = BuyStrategy()
+
+# ======================
+# Оценка предмета
+# ======================
+def screen_values(buy, sale, lastday, last2day):
+    """Цены itemmoney (с комиссиями) → числа экрана, по которым работает правило ордера."""
+    buy, sale = stored_to_screen(buy, sale)
+    return int(buy), int(sale), lastday, last2day
+
+def rule_miss(buy, sale, lastday, last2day, strategy=DEFAULT_STRATEGY):
+    """Насколько значения экрана не дотянули до правила ордера: 0 — проходят, 1 — совсем мимо.
+
+    Пороги — из strategy (BuyStrategy), того же правила, что у сканера.
+    """
+    if buy <= 0 or sale <= 0:
+        return 1.0
+    min_ratio, max_ratio, min_sold = strategy.min_ratio, strategy.max_ratio, strategy.min_sold
+    ratio = sale / buy
+    if ratio < min_ratio:
+        # считаем по прибыли (ratio - 1): 1.35 — почти прошёл, 1.05 — далеко
+        ratio_miss = min(1.0, (min_ratio - ratio) / max(min_ratio - 1, 1e-9))
+    elif ratio > max_ratio:
+        ratio_miss = min(1.0, (ratio - max_ratio) / max_ratio)
+    else:
+        ratio_miss = 0.0
+    total_sold = lastday + last2day
+    volume_miss = 0.0 if total_sold > min_sold else (min_sold + 1 - total_sold) / max(min_sold + 1, 1)
+    return max(ratio_miss, volume_miss)
+
+def value_score(buy, sale, lastday, last2day, age_hours=None, strategy=DEFAULT_STRATEGY):
+    """Ожидаемая ценность скана: прибыль × log(объём) × вес возраста данных."""
+    ratio = min(sale / buy, strategy.max_ratio) if buy > 0 and sale > 0 else 0.0
+    score = max(0.0, ratio - 1) * math.log1p(max(0, lastday + last2day))
+    score *= 1 - rule_miss(buy, sale, lastday, last2day, strategy)
+    if age_hours is not None:
+        score *= 1 + age_hours / AGE_HOURS
+    return score
+
+
+# ======================
+# Свежесть данных
+# ======================
+class FreshnessPolicy:
+    """Срок свежести данных предмета (TTL) в часах.
+
+    Базовый срок делится на 1 + вес × изменчивость цены (коэффициент
+    вариации продажи за VOLATILITY_DAYS дней): спокойные предметы
+    пересканируются реже, скачущие — чаще, но не чаще MIN_FRESH_HOURS.
+    """
+
+    def __init__(self, hours=FRESH_HOURS, min_hours=MIN_FRESH_HOURS, weight=VOLATILITY_WEIGHT, volatility=None):
+        self.hours = hours
+        self.min_hours = min_hours
+        self.weight = weight
+        self.volatility = volatility or {}
+
+    @classmethod
+    def load(cls, days=VOLATILITY_DAYS, **kwargs):
+        from storage import read_volatility
+        return cls(volatility=read_volatility(days), **kwargs)
+
+    def ttl(self, item_id):
+        hours = self.hours / (1 + self.weight * self.volatility.get(item_id, 0.0))
+        return max(self.min_hours, hours)
+
+    def is_fresh(self, item_id, age_hours):
+        return age_hours is not None and age_hours < self.ttl(item_id)
+
+
+# ======================
+# Порядок сканирования
+# ======================
+class ScanPlanner:
+    """Порядок и отсев предметов по прошлым наблюдениям из itemmoney.
+
+    Цены itemmoney хранятся с комиссиями — перед оценкой они переводятся
+    обратно в числа экрана (screen_values), как их видит правило ордера;
+    пороги — из strategy (STRATEGY сканера), по умолчанию BuyStrategy().
+
+    Сначала — предметы, прошедшие правило ордера, за ними близкие к нему,
+    по убыванию ценности (прибыль, объём, возраст данных); затем ещё не
+    сканированные; в конце — промахнувшиеся «с запасом» с давними данными,
+    самые старые первыми. Промахнувшиеся с запасом недавно пропускаются.
+    С freshness предметы со свежими данными (моложе их срока) не сканируются.
+    """
+
+    def __init__(self, observations, freshness=None, strategy=None, far_miss=FAR_MISS,
+                 recheck_hours=RECHECK_HOURS, now=None):
+        self.observations = observations
+        self.strategy = strategy or DEFAULT_STRATEGY
+        self.freshness = freshness
+        self.far_miss = far_miss
+        self.recheck_hours = recheck_hours
+        self.now = now or datetime.now(timezone.utc)
+
+    @classmethod
+    def load(cls, incremental=True, **kwargs):
+        from storage import read_last_observations
+        freshness = FreshnessPolicy.load() if incremental else None
+        return cls(read_last_observations(), freshness=freshness, **kwargs)
+
+    def age_hours(self, observed_at):
+        if observed_at is None:
+            return None
+        return max(0.0, (self.now - observed_at).total_seconds() / 3600)
+
+    def fresh_ids(self, items):
+        """id предметов, чьи данные ещё свежие (их пропустит план)."""
+        return {item.id for item in self.plan(items).fresh}
+
+    def plan(self, items):
+        ranked, unseen, stale, skipped, fresh = [], [], [], [], []
+        for index, item in enumerate(items):
+            observation = self.observations.get(item.id)
+            if observation is None or any(value is None for value in observation[:4]):
+                unseen.append(item)
+                continue
+            *stored, observed_at = observation
+            values = screen_values(*stored)
+            miss = rule_miss(*values, strategy=self.strategy)
+            age = self.age_hours(observed_at)
+            if self.freshness is not None and self.freshness.is_fresh(item.id, age):
+                fresh.append(item)
+            elif miss < self.far_miss:
+                # прошедшие правило — раньше близких к нему, внутри — по ценности
+                ranked.append((miss > 0, -value_score(*values, age_hours=age, strategy=self.strategy), index, item))
+            elif age is not None and age < self.recheck_hours:
+                skipped.append(item)
+            else:
+                stale.append((-(age if age is not None else math.inf), index, item))
+        ordered = [item for *_, item in sorted(ranked)] + unseen + [item for *_, item in sorted(stale)]
+        return ScanPlan(ordered, skipped, fresh)
+
+    @staticmethod
+    def summary(plan):
+        return (
+            f"🧭 План сканирования: {len(plan.items)} предм., свежие данные: {len(plan.fresh)}, "
+            f"мимо правила недавно: {len(plan.skipped)}"
+        )
@@ -0,0 +1,97 @@
+import json
+import os
+
+# ======================
+# Константы
+# ======================
+CONFIG_FILE = "config.json"
+REGION_NAMES = ['A', 'B', 'C', 'D', 'D1', 'E', 'F', 'G', 'H', 'J', 'K', 'L']
+# Необязательные области: без них — поиск иконок по всему экрану (L) и объёмы без графика (K)
+OPTIONAL_REGIONS = ('K', 'L')
+
+# Профили разметки — по одному на окно клиента игры; «default» — config.json
+PROFILES_DIR = "profiles"
+DEFAULT_PROFILE = "default"
+
+def profile_path(name=DEFAULT_PROFILE):
+    if name == DEFAULT_PROFILE:
+        return CONFIG_FILE
+    return os.path.join(PROFILES_DIR, f"{name}.json")
+
+def list_profiles():
+    """Имена сохранённых профилей; «default» всегда первый."""
+    try:
+        names = sorted(name[:-5] for name in os.listdir(PROFILES_DIR) if name.endswith('.json'))
+    except FileNotFoundError:
+        names = []
+    return [DEFAULT_PROFILE] + [name for name in names if name != DEFAULT_PROFILE]
+
+
+# ======================
+# Разметка экрана в памяти
+# ======================
+class RegionMap:
+    """Разметка областей A–L: читается из файла один раз и держится в памяти.
+
+    Прямоугольники, центры и правые нижние точки считаются при загрузке.
+    Файл перечитывается только если изменился его mtime (например, после
+    сохранения разметки в SetupWindow).
+    """
+
+    def __init__(self, path=CONFIG_FILE):
+        self.path = path
+        self._mtime = None
+        self._rects = {}
+        self._centers = {}
+        self._bottom_rights = {}
+
+    @classmethod
+    def for_profile(cls, name=DEFAULT_PROFILE):
+        return cls(profile_path(name))
+
+    def _refresh(self):
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except FileNotFoundError:
+            raise FileNotFoundError(f"Файл конфигурации {self.path} не найден.")
+        if mtime == self._mtime:
+            return
+        with open(self.path, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+        self._load(config)
+        self._mtime = mtime
+
+    def _load(self, config):
+        rects, centers, bottom_rights = {}, {}, {}
+        for name, r in config.items():
+            x, y, w, h = r['x'], r['y'], r['width'], r['height']
+            rects[name] = (x, y, w, h)
+            centers[name] = (x + w // 2, y + h // 2)
+            bottom_rights[name] = (x + w - 1, y + h - 1)
+        self._rects = rects
+        self._centers = centers
+        self._bottom_rights = bottom_rights
+
+    def invalidate(self):
+        """Сбрасывает кэш — следующий запрос перечитает файл."""
+        self._mtime = None
+
+    def _get(self, table_name, region_name):
+        self._refresh()
+        try:
+            return getattr(self, table_name)[region_name]
+        except KeyError:
+            raise ValueError(f"Область '{region_name}' не найдена.")
+
+    def rect(self, region_name):
+        return self._get('_rects', region_name)
+
+    def center(self, region_name):
+        return self._get('_centers', region_name)
+
+    def bottom_right(self, region_name):
+        return self._get('_bottom_rights', region_name)
+
+    def names(self):
+        self._refresh()
+        return list(self._rects)
@@ -0,0 +1,383 @@
+import json
+import os
+import queue
+import shutil
+import sys
+import threading
+import time
+
+import numpy as np
+from PIL import Image
+
+from capture import Frame
+from catalog import CatalogItem
+from regions import CONFIG_FILE, RegionMap
+
+# ======================
+# Константы
+# ======================
+RECORDINGS_DIR = "recordings"
+EVENTS_FILE = "events.jsonl"
+RUN_FILE = "run.json"
+FRAMES_DIR = "frames"
+VALUE_FIELDS = ('D', 'D1', 'E', 'C')
+
+# ======================
+# Запись прогона
+# ======================
+class ScanRecorder:
+    """Запись реального прогона: каждый снятый кадр и каждое действие ввода.
+
+    Папка записи: events.jsonl (события с отметкой времени), frames/*.png,
+    run.json (предметы и настройки сканера), копия config.json и иконок —
+    этого достаточно, чтобы воспроизвести прогон без игры (replay).
+    PNG сохраняются в фоновом потоке, чтобы не тормозить сканирование.
+    """
+
+    def __init__(self, folder, regions, items, settings=None):
+        self.folder = folder
+        os.makedirs(os.path.join(folder, FRAMES_DIR), exist_ok=True)
+        os.makedirs(os.path.join(folder, "pic"), exist_ok=True)
+        shutil.copy(regions.path, os.path.join(folder, CONFIG_FILE))
+        manifest = []
+        for item in items:
+            icon = os.path.basename(item.image_path)
+            if item.has_image:
+                shutil.copy(item.image_path, os.path.join(folder, "pic", icon))
+            manifest.append([item.id, item.name, item.namebot, icon, item.has_image])
+        with open(os.path.join(folder, RUN_FILE), 'w', encoding='utf-8') as f:
+            json.dump({'items': manifest, 'settings': settings or {}}, f, ensure_ascii=False, indent=2)
+
+        self._events = open(os.path.join(folder, EVENTS_FILE), 'w', encoding='utf-8')
+        self._lock = threading.Lock()
+        self._started_at = time.monotonic()
+        self._count = 0
+        self._pending = queue.Queue()
+        self._saver = threading.Thread(target=self._save_frames, name="recorder", daemon=True)
+        self._saver.start()
+
+    def log(self, kind, **data):
+        event = {'t': round(time.monotonic() - self._started_at, 4), 'kind': kind}
+        event.update(data)
+        with self._lock:
+            self._events.write(json.dumps(event, ensure_ascii=False) + "\n")
+
+    def _save_frames(self):
+        while True:
+            job = self._pending.get()
+            if job is None:
+                return
+            path, array = job
+            Image.fromarray(array).save(path, compress_level=1)
+
+    def save_frame(self, array):
+        with self._lock:
+            self._count += 1
+            name = f"{FRAMES_DIR}/{self._count:06d}.png"
+        self._pending.put((os.path.join(self.folder, name), array))
+        return name
+
+    def frames(self, source):
+        return RecordingFrameSource(source, self)
+
+    def inputs(self, backend):
+        return RecordingInputProxy(backend, self)
+
+    def on_values(self, item_id, values):
+        self.log('item', item_id=item_id,
+                 values={k: values[k] for k in VALUE_FIELDS if k in values},
+                 history=values.get('history', []))
+
+    def close(self):
+        self._pending.put(None)
+        self._saver.join()
+        with self._lock:
+            self._events.close()
+        print(f"📼 Запись прогона сохранена: {self.folder} ({self._count} кадров)")
+
+
+class RecordingFrameSource:
+    """Источник кадров, который сохраняет каждый снятый кадр в запись."""
+
+    def __init__(self, source, recorder):
+        self.source = source
+        self.recorder = recorder
+        self.regions = source.regions
+
+    def grab(self, region_names=None, rect=None):
+        frame = self.source.grab(region_names, rect)
+        self.recorder.log(
+            'grab',
+            regions=list(region_names) if region_names else None,
+            rect=list(rect) if rect else None,
+            origin=list(frame.origin),
+            file=self.recorder.save_frame(frame.array),
+        )
+        return frame
+
+
+class RecordingInputProxy:
+    """Способ ввода, который записывает каждое действие и передаёт его дальше."""
+
+    def __init__(self, backend, recorder):
+        self.backend = backend
+        self.recorder = recorder
+
+    def click(self, x, y):
+        self.recorder.log('click', x=x, y=y)
+        self.backend.click(x, y)
+
+    def move(self, x, y):
+        self.recorder.log('move', x=x, y=y)
+        self.backend.move(x, y)
+
+    def enter(self, field, text):
+        self.recorder.log('enter', field=field, text=text)
+        return self.backend.enter(field, text)
+
+    def __getattr__(self, name):
+        return getattr(self.backend, name)
+
+
+def new_recording_folder(root=RECORDINGS_DIR):
+    return os.path.join(root, time.strftime("%Y%m%d_%H%M%S"))
+
+
+# ======================
+# Воспроизведение
+# ======================
+def load_events(folder):
+    with open(os.path.join(folder, EVENTS_FILE), 'r', encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def load_run(folder):
+    """(предметы, настройки) записи; иконки берутся из папки записи."""
+    with open(os.path.join(folder, RUN_FILE), 'r', encoding='utf-8') as f:
+        run = json.load(f)
+    items = [
+        CatalogItem(item_id, name, namebot, os.path.join(folder, "pic", icon), has_image)
+        for item_id, name, namebot, icon, has_image in run['items']
+    ]
+    return items, run.get('settings', {})
+
+
+def _grab_key(region_names, rect):
+    return (tuple(region_names) if region_names else None, tuple(rect) if rect else None)
+
+
+class ReplayFrameSource:
+    """Кадры записи в ответ на те же запросы, что делал сканер при записи.
+
+    Запрос сопоставляется со следующим записанным захватом. Ожидания
+    опрашивают экран разное число раз: лишние записанные опросы предыдущей
+    области пропускаются, а если опросов не хватило — повторяется последний
+    кадр этой области.
+    """
+
+    def __init__(self, folder, events, regions):
+        self.folder = folder
+        self.regions = regions
+        self.grabs = [e for e in events if e['kind'] == 'grab']
+        self.keys = [_grab_key(e['regions'], e['rect']) for e in self.grabs]
+        self.cursor = 0
+        self.repeats = 0
+        self._previous = None
+        self._last = {}
+        self._cache = {}
+
+    def _frame(self, index):
+        event = self.grabs[index]
+        array = self._cache.get(index)
+        if array is None:
+            with Image.open(os.path.join(self.folder, event['file'])) as img:
+                array = np.asarray(img.convert('RGB'))
+            if len(self._cache) > 256:
+                self._cache.clear()
+            self._cache[index] = array
+        return Frame(array, origin=tuple(event['origin']), regions=self.regions)
+
+    def grab(self, region_names=None, rect=None):
+        key = _grab_key(region_names, rect)
+        index = self.cursor
+        while index < len(self.keys) and self.keys[index] != key and self.keys[index] == self._previous:
+            index += 1
+        self._previous = key
+        if index < len(self.keys) and self.keys[index] == key:
+            self.cursor = index + 1
+            self._last[key] = index
+            return self._frame(index)
+        self.repeats += 1
+        index = self._last.get(key)
+        if index is None:
+            if key not in self.keys:
+                raise ValueError(f"В записи нет кадра для запроса {key}.")
+            index = self.keys.index(key)
+        return self._frame(index)
+
+
+class VirtualClock:
+    """Время ожиданий при воспроизведении: sleep только сдвигает часы."""
+
+    def __init__(self):
+        self.now = 0.0
+
+    def time(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += max(0.0, seconds)
+
+
+class StageTimer:
+    """Время по этапам: {этап: [вызовов, секунд, максимум]}."""
+
+    def __init__(self):
+        self.stages = {}
+
+    def add(self, stage, seconds):
+        stat = self.stages.setdefault(stage, [0, 0.0, 0.0])
+        stat[0] += 1
+        stat[1] += seconds
+        stat[2] = max(stat[2], seconds)
+
+    def wrap(self, obj, stage, methods):
+        return _Timed(obj, self, stage, methods)
+
+
+class _Timed:
+    def __init__(self, obj, timer, stage, methods):
+        self._obj = obj
+        self._timer = timer
+        self._stage = stage
+        self._methods = methods
+
+    def __getattr__(self, name):
+        attr = getattr(self._obj, name)
+        if name not in self._methods:
+            return attr
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return attr(*args, **kwargs)
+            finally:
+                self._timer.add(self._stage, time.perf_counter() - start)
+        return timed
+
+
+class ListWriter:
+    """Запись в БД при воспроизведении: строки остаются в памяти."""
+
+    def __init__(self):
+        self.rows = []
+
+    def add(self, item_id, buy=None, sale=None, lastday=None, last2day=None):
+        self.rows.append((item_id, buy, sale, lastday, last2day))
+
+    def flush(self):
+        return len(self.rows)
+
+
+def percentile(values, q):
+    return float(np.percentile(values, q)) if values else 0.0
+
+
+def replay(folder, reader=None, pipeline_workers=None):
+    """Прогоняет сканер по записи без игры. Возвращает сводку (dict) и печатает отчёт.
+
+    reader — FieldReader для проверки (по умолчанию create_field_reader() без
+    кэша OCR: в ocr_cache.json живой прогон уже сложил ответы на эти же
+    вырезки, и проверка с ним не прошла бы через распознавание).
+    """
+    from inputs import RecordingInput
+    from locator import IconLocator
+    from scanner import Scanner
+    from waits import ScreenWaiter
+
+    if reader is None:
+        from ocr import create_field_reader
+        reader = create_field_reader(cache_path=None)
+
+    events = load_events(folder)
+    items, settings = load_run(folder)
+    regions = RegionMap(os.path.join(folder, CONFIG_FILE))
+    timer = StageTimer()
+    clock = VirtualClock()
+
+    source = ReplayFrameSource(folder, events, regions)
+    frames = timer.wrap(source, 'capture', ('grab',))
+    waiter = timer.wrap(
+        ScreenWaiter(frames, sleep=clock.sleep, clock=clock.time),
+        'wait', ('snapshot', 'until_changed', 'until_stable'),
+    )
+    sink = RecordingInput()
+    replayed, finished_at = {}, []
+
+    def on_values(item_id, values):
+        finished_at.append(time.perf_counter())
+        replayed[item_id] = values
+
+    scanner = Scanner(
+        items, regions, frames,
+        timer.wrap(IconLocator(regions), 'locate', ('locate', 'locate_many')),
+        timer.wrap(reader, 'ocr', ('read',)),
+        timer.wrap(ListWriter(), 'db', ('add', 'flush')),
+        lookahead=settings.get('lookahead', 8),
+        pipeline_workers=settings.get('pipeline_workers', 0) if pipeline_workers is None else pipeline_workers,
+        waiter=waiter,
+        input_backend=timer.wrap(sink, 'input', ('click', 'move', 'enter')),
+        history_days=settings.get('history_days', 2),
+        on_values=on_values,
+    )
+    started_at = time.perf_counter()
+    scanner.run()
+    total = time.perf_counter() - started_at
+
+    # сверка с записью
+    recorded = {e['item_id']: e['values'] for e in events if e['kind'] == 'item'}
+    mismatches = []
+    for item_id, values in recorded.items():
+        got = replayed.get(item_id)
+        for field, expected in values.items():
+            actual = got.get(field) if got else None
+            if actual != expected:
+                mismatches.append((item_id, field, expected, actual))
+    recorded_texts = [(e['field'], e['text']) for e in events if e['kind'] == 'enter']
+    replayed_texts = [(e[2], e[3]) for e in sink.events if e[1] == 'enter']
+
+    item_times = [e['t'] for e in events if e['kind'] == 'item']
+    live = [b - a for a, b in zip(item_times, item_times[1:])]
+    offline = [b - a for a, b in zip([started_at] + finished_at, finished_at)]
+
+    print(f"📼 Запись {folder}: {len(items)} предм., {len(source.grabs)} кадров"
+          f" (повторов кадра: {source.repeats})")
+    print(f"⏱ Воспроизведение: {total:.2f} с, по этапам:")
+    for stage, (count, seconds, worst) in sorted(timer.stages.items(), key=lambda s: -s[1][1]):
+        print(f"   {stage:<8} вызовов {count:>5}  всего {seconds * 1000:8.1f} мс"
+              f"  среднее {seconds / count * 1000:6.2f} мс  макс {worst * 1000:6.2f} мс")
+    print(f"📋 На предмет: без игры p50 {percentile(offline, 50) * 1000:.1f} мс,"
+          f" p95 {percentile(offline, 95) * 1000:.1f} мс;"
+          f" в записи p50 {percentile(live, 50) * 1000:.0f} мс, p95 {percentile(live, 95) * 1000:.0f} мс")
+    checked = sum(len(v) for v in recorded.values())
+    print(f"🔢 OCR: совпало {checked - len(mismatches)}/{checked}")
+    for item_id, field, expected, actual in mismatches[:20]:
+        print(f"   ❌ ID={item_id} {field}: в записи {expected}, сейчас {actual}")
+    same_input = recorded_texts == replayed_texts
+    print(f"⌨️ Ввод текста {'совпадает с записью' if same_input else 'отличается от записи'}"
+          f" ({len(replayed_texts)} из {len(recorded_texts)})")
+
+    return {
+        'total': total,
+        'stages': {stage: {'count': c, 'seconds': s, 'max': m} for stage, (c, s, m) in timer.stages.items()},
+        'item_p50': percentile(offline, 50),
+        'item_p95': percentile(offline, 95),
+        'mismatches': mismatches,
+        'same_input': same_input,
+    }
+
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 2:
+        replay(sys.argv[1], pipeline_workers=int(sys.argv[2]) if len(sys.argv) > 2 else None)
+    else:
+        print("Использование: python replay.py <папка записи> [потоков OCR]")
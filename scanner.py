@@ -0,0 +1,561 @@
+import queue
+import threading
+import time
+from contextlib import nullcontext
+
+from history import HistoryCapture, SalesHistoryReader
+from strategy import BUY_FEE, SALE_FEE, BuyStrategy
+from telemetry import RunStats
+from waits import ScreenWaiter
+
+# ======================
+# Управление сканированием
+# ======================
+RUNNING = "running"
+PAUSED = "paused"
+STOPPING = "stopping"
+
+FIELD_LABELS = {
+    'D': "📈 Продажа (D)",
+    'D1': "📈 Закуп (D1)",
+    'E': "📦 Продано (E)",
+    'C': "📦 Продано вчера (C)",
+}
+
+# Наибольшее ожидание реакции клиента (раньше — фиксированные паузы).
+# Обычно ожидание заканчивается раньше, как только экран изменился.
+WAIT_TYPE = 0.1      # текст в поле ввода
+WAIT_SEARCH = 0.25   # выдача поиска (область L)
+WAIT_OPEN = 0.25     # окно предмета после клика (область D)
+WAIT_HOVER = 0.5     # подсказка E/C после наведения
+WAIT_ORDER = 0.3     # кнопка «Заказ на покупку» (H)
+WAIT_CLOSE = 0.25    # окно предмета закрылось (J)
+
+
+class ScanStopped(Exception):
+    """Запрошена остановка — текущий предмет прерывается."""
+
+
+class ScanControl:
+    """Состояние сканирования: работает / пауза / остановка.
+
+    Общее для потока сканирования и горячих клавиш. Все ожидания сканера
+    идут через sleep(), поэтому пауза и остановка срабатывают в пределах
+    миллисекунд, а не после текущего предмета.
+    """
+
+    def __init__(self, on_change=None):
+        self._cond = threading.Condition()
+        self.state = RUNNING
+        self.on_change = on_change
+
+    def _set(self, state):
+        with self._cond:
+            if self.state == STOPPING or self.state == state:
+                return
+            self.state = state
+            self._cond.notify_all()
+        if self.on_change:
+            self.on_change(state)
+
+    def pause(self):
+        self._set(PAUSED)
+
+    def resume(self):
+        self._set(RUNNING)
+
+    def toggle_pause(self):
+        self._set(RUNNING if self.state == PAUSED else PAUSED)
+
+    def stop(self):
+        self._set(STOPPING)
+
+    def checkpoint(self):
+        """Ждёт, пока стоит пауза; при остановке — ScanStopped."""
+        self.sleep(0)
+
+    def sleep(self, seconds):
+        """time.sleep, который замирает на паузе и прерывается остановкой."""
+        deadline = time.monotonic() + seconds
+        with self._cond:
+            while True:
+                if self.state == STOPPING:
+                    raise ScanStopped()
+                if self.state == PAUSED:
+                    paused_at = time.monotonic()
+                    self._cond.wait()
+                    deadline += time.monotonic() - paused_at
+                    continue
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return
+                self._cond.wait(remaining)
+
+
+# ======================
+# Цикл сканирования
+# ======================
+class Scanner:
+    """Обработка выбранных предметов: поиск, OCR, ордер, запись в БД.
+
+    Не зависит от Qt — о ходе работы сообщает через on_progress(сделано, всего)
+    и on_result((item_id, buy, sale, lastday, last2day)); все снятые числа предмета — через
+    on_values(item_id, values). Когда по предмету сделано всё, включая ордер,
+    вызывается on_item_done(result) — в конвейере это может быть заметно позже
+    on_result (ордер ставится отложенно). Время этапов копится в stats (RunStats). При pipeline_workers > 0 OCR и запись
+    идут в фоне (OcrPipeline), пока интерфейс ищет следующий предмет.
+    Решение об ордере — strategy (BuyStrategy, тот же объект, что в симуляторе).
+    input_lock — общий замок ввода, когда несколько сканеров делят одну мышь
+    и клавиатуру (ParallelScan): клик с вводом и наведение на график держат
+    его целиком, ожидания экрана и OCR идут без него.
+    """
+
+    def __init__(self, items, regions, frames, locator, reader, writer,
+                 control=None, lookahead=8, pipeline_workers=0, pipeline_queue=4,
+                 waiter=None, input_backend=None, history_days=2, stats=None,
+                 strategy=None, input_lock=None, on_progress=None, on_result=None, on_values=None,
+                 on_item_done=None):
+        if input_backend is None:
+            from inputs import DirectInput
+            input_backend = DirectInput()
+        self.input = input_backend
+        self.input_lock = input_lock or nullcontext()
+        self.strategy = strategy or BuyStrategy()
+        self.items = items
+        self.regions = regions
+        self.frames = frames
+        self.locator = locator
+        self.reader = reader
+        self.writer = writer
+        self.control = control or ScanControl()
+        self.waiter = waiter or ScreenWaiter(frames, sleep=self.control.sleep)
+        self.history = SalesHistoryReader(regions, frames, self.waiter, self.input,
+                                          hover_days=history_days, timeout=WAIT_HOVER)
+        self.stats = stats or RunStats(total=len(items))
+        self.lookahead = lookahead
+        self.on_progress = on_progress
+        self.on_result = on_result
+        self.on_values = on_values
+        self.on_item_done = on_item_done
+        self.pipeline_workers = pipeline_workers
+        self.pipeline_queue = pipeline_queue
+        self.pipeline = None
+        self.index = 0
+        self.results = []
+        self._results_lock = threading.Lock()
+
+    # ---------- действия в окне игры ----------
+    def click_and_type(self, region_name, text):
+        x, y = self.regions.center(region_name)
+        with self.input_lock:
+            self.input.click(x, y)
+            self.input.enter(region_name, text)
+        # поле дорисовало текст
+        self.waiter.until_stable(region_name, WAIT_TYPE)
+
+    def click_center(self, region_name):
+        x, y = self.regions.center(region_name)
+        with self.input_lock:
+            self.input.click(x, y)
+
+    def click_and_wait(self, region_name, watch_region, timeout):
+        """Клик в центр области и ожидание изменения watch_region."""
+        before = self.waiter.snapshot(watch_region)
+        self.click_center(region_name)
+        return self.waiter.until_changed(watch_region, before, timeout)
+
+    def search(self, namebot):
+        """Ввод запроса в A и ожидание новой выдачи; возвращает кадр области поиска."""
+        watch = self.locator.search_region if self.locator.search_area() else None
+        before = self.waiter.snapshot(watch) if watch else None
+        self.click_and_type('A', namebot)
+        if watch:
+            self.waiter.until_changed(watch, before, WAIT_SEARCH)
+        return self.frames.grab(rect=self.locator.search_area())
+
+    def close_item(self):
+        self.click_and_wait('J', 'D', WAIT_CLOSE)
+
+    def read_fields(self, crops, item_id=None):
+        """Распознаёт вырезки предмета: шаблоны цифр, остальное — одним вызовом tesseract.
+
+        crops: {область: вырезка}. Возвращает {область: число}; поле, которое
+        не удалось снять или распознать, записывается как 0.
+        """
+        values = {region_name: 0 for region_name in FIELD_LABELS}
+        timings = {}
+        read, errors = self.reader.read(crops, timings)
+        for region_name, seconds in timings.items():
+            stage = f"ocr:{region_name}" if region_name in FIELD_LABELS else "ocr:history"
+            self.stats.record(stage, seconds, item_id)
+        for region_name in crops:
+            if region_name in read:
+                values[region_name] = read[region_name]
+                label = FIELD_LABELS.get(region_name, f"📦 Продано ({region_name})")
+                print(f"{label}: {values[region_name]}")
+            else:
+                print(f"⚠️ Ошибка {region_name}: {errors[region_name]} → будет записано 0")
+        return values
+
+    def read_item(self, crops, history, item_id=None):
+        """Числа предмета: поля D/D1/E/C и объёмы продаж по всем видимым дням."""
+        values = self.read_fields(crops, item_id)
+        volumes = self.history.volumes(history, values)
+        if volumes:
+            values['E'] = volumes[0]
+            if len(volumes) > 1:
+                values['C'] = volumes[1]
+        if len(volumes) > 2:
+            print(f"📊 Продажи по дням: {volumes}")
+        values['history'] = volumes
+        return values
+
+    # ---------- цикл ----------
+    def run(self, start_delay=0):
+        """Проходит все предметы; возвращает results. Остановка прерывает цикл сразу."""
+        if self.pipeline_workers:
+            self.pipeline = OcrPipeline(self, self.pipeline_workers, self.pipeline_queue)
+        try:
+            if start_delay:
+                print(f"⏳ Начало анализа через {start_delay:g} секунды...")
+                self.control.sleep(start_delay)
+            while self.index < len(self.items):
+                self.control.checkpoint()
+                self.drain_orders()
+                self.process_next_item()
+                if self.on_progress:
+                    self.on_progress(self.index, len(self.items))
+            if self.pipeline is not None:
+                # последние вырезки и ордера по ним
+                self.pipeline.join()
+                self.drain_orders()
+        except ScanStopped:
+            print("⏹ Сканирование остановлено")
+        finally:
+            if self.pipeline is not None:
+                self.pipeline.close()
+                left = self.pipeline.pending_orders()
+                if left:
+                    print(f"⚠️ Не выставлено ордеров: {len(left)}")
+                self.pipeline.report()
+                self.pipeline = None
+            print(self.waiter.summary())
+            print(self.stats.report())
+            if hasattr(self.input, 'report'):
+                print(self.input.report())
+            if hasattr(self.reader, 'report'):
+                print(self.reader.report())
+            try:
+                written = self.writer.flush()
+                print(f"✅ Записано в БД: {written} предм. (последняя пачка)")
+            except Exception as e:
+                print(f"❌ Ошибка записи в БД: {e}")
+            self.stats.close()
+        return self.results
+
+    def skip_item(self):
+        self.close_item()
+        self.index += 1
+
+    def process_next_item(self):
+        current = self.items[self.index]
+        item_id, namebot = current.id, current.namebot
+        try:
+            print(f"📋 Обработка: ID={item_id}, '{namebot}'")
+
+            # === Ввод поиска ===
+            with self.stats.span('search', item_id):
+                frame = self.search(namebot)
+
+            # === Поиск изображений pic/{name}.png ===
+            # Текущий предмет и несколько следующих: тиры одного предмета часто
+            # видны в одной выдаче, их ищем одним проходом по кадру
+            batch = []
+            for item in self.items[self.index:self.index + self.lookahead]:
+                if not item.has_image:
+                    if item.id == item_id:
+                        print(f"⚠️ Файл изображения не найден: {item.image_path}")
+                        self.skip_item()
+                        return
+                    break
+                batch.append(item)
+
+            # 🔍 Поиск иконок в списке результатов (без OpenCV)
+            with self.stats.span('locate', item_id):
+                locations = self.locator.locate_many(frame, [item.image_path for item in batch])
+            if locations[batch[0].image_path] is None:
+                print(f"❌ Изображение не найдено на экране: {batch[0].name}")
+                self.skip_item()
+                return
+
+            # Подряд идущие предметы, найденные в этой выдаче, — без повторного поиска
+            for k, item in enumerate(batch):
+                location = locations[item.image_path]
+                if location is None:
+                    break
+                if k:
+                    self.control.checkpoint()
+                    print(f"📋 Обработка: ID={item.id}, '{item.namebot}' (в той же выдаче)")
+                self.process_found_item(item, location)
+                self.index += 1
+            return
+
+        except ScanStopped:
+            raise
+        except Exception as e:
+            print(f"❌ Ошибка при обработке {item_id}: {e}")
+
+        self.index += 1
+
+    def open_item(self, location):
+        """Клик по кнопке «Заказ на продажу» справа от найденной иконки."""
+        center_x = location.left + location.width // 2
+        center_y = location.top + location.height // 2
+
+        # Получаем смещение — ширина области B из конфига
+        _, _, w_B, _ = self.regions.rect('B')
+        target_x = center_x + w_B
+        target_y = center_y
+
+        print(f"🎯 Найдено изображение: ({center_x}, {center_y}) → клик в ({target_x}, {target_y})")
+        before = self.waiter.snapshot('D')
+        with self.input_lock:
+            self.input.click(target_x, target_y)
+        self.waiter.until_changed('D', before, WAIT_OPEN)
+
+    def capture_item(self, item_id=None):
+        """Вырезки открытого предмета: D/D1 из одного кадра, подсказки продаж — по графику.
+
+        Возвращает (вырезки, HistoryCapture).
+        """
+        crops = {}
+        history = HistoryCapture([], {})
+        try:
+            with self.stats.span('capture', item_id):
+                frame = self.frames.grab(['D', 'D1'])
+            crops['D'] = frame.crop('D')        # продажа
+            crops['D1'] = frame.crop('D1')      # закуп
+        except Exception as e:
+            print(f"⚠️ Ошибка D/D1: {e} → будет записано 0")
+
+        # Подсказки E (вчера), C (позавчера), ... появляются только при наведении
+        try:
+            # подсказка видна, только пока мышь над столбиком — ввод держим до конца
+            with self.stats.span('history', item_id), self.input_lock:
+                history = self.history.capture()
+            crops.update(history.tooltips)
+        except ScanStopped:
+            raise
+        except Exception as e:
+            print(f"⚠️ Ошибка истории продаж: {e} → будет записано 0")
+        return crops, history
+
+    def place_order(self, qty, price):
+        # Клик в центр F и ввод количества
+        self.click_and_type('F', str(qty))
+
+        # Клик в центр G и ввод цены (D + 1)
+        self.click_and_type('G', str(price))
+
+        # Нажатие на кнопку "Заказ на покупку" (H)
+        self.click_and_wait('H', 'H', WAIT_ORDER)
+
+        print(f"✅ Выставлен ордер: кол-во={qty}, цена={price}")
+
+    def evaluate(self, values):
+        """Решение по снятым числам: (кол-во, цена) или None."""
+        sale_raw, buy_raw = values['D'], values['D1']
+        lastday_raw, last2day_raw = values['E'], values['C']
+        order = self.strategy.decide(buy_raw, sale_raw, lastday_raw, last2day_raw)
+        if order is None:
+            print("⏭️ Условие не выполнено — пропуск выставления ордера")
+            return None
+        qty, price, ratio = order
+        print(f"🛒 Условие выполнено: прибыль x{ratio:.2f}, продано за 2 дня: {lastday_raw + last2day_raw}")
+        return qty, price
+
+    def record(self, item_id, values):
+        """Запись чисел предмета в БД (пачкой) и в результаты прогона."""
+        sale_raw, buy_raw = values['D'], values['D1']
+        lastday_raw, last2day_raw = values['E'], values['C']
+        with self.stats.span('db', item_id):
+            self.writer.add(
+                item_id=item_id,
+                buy=int(buy_raw * BUY_FEE),
+                sale=int(sale_raw * SALE_FEE),
+                lastday=lastday_raw,
+                last2day=last2day_raw
+            )
+        self.stats.item_done()
+        print(f"💾 В очереди на запись в БД: buy={buy_raw}, sale={sale_raw}, lastday={lastday_raw}")
+
+        result = (item_id, buy_raw, sale_raw, lastday_raw, last2day_raw)
+        with self._results_lock:
+            self.results.append(result)
+        if self.on_result:
+            self.on_result(result)
+        if self.on_values:
+            self.on_values(item_id, values)
+        return result
+
+    def item_done(self, result):
+        """Предмет обработан целиком (числа записаны, ордер выставлен или не нужен)."""
+        if self.on_item_done:
+            self.on_item_done(result)
+
+    def process_found_item(self, item, location):
+        """Открывает найденный предмет, снимает цены/объёмы, ставит ордер и пишет в БД.
+
+        В конвейерном режиме OCR и запись уходят в фоновые потоки, а окно
+        предмета закрывается сразу после снятия вырезок.
+        """
+        try:
+            with self.stats.span('open', item.id):
+                self.open_item(location)
+            crops, history = self.capture_item(item.id)
+
+            if self.pipeline is not None:
+                with self.stats.span('close', item.id):
+                    self.close_item()
+                self.pipeline.submit(item, crops, history)
+                return
+
+            values = self.read_item(crops, history, item.id)
+            order = self.evaluate(values)
+            if order:
+                with self.stats.span('order', item.id):
+                    self.place_order(*order)
+            self.item_done(self.record(item.id, values))
+
+            with self.stats.span('close', item.id):
+                self.close_item()
+
+        except ScanStopped:
+            raise
+        except Exception as e:
+            print(f"❌ Ошибка при обработке {item.id}: {e}")
+
+    def place_deferred_order(self, item, qty, price, result=None):
+        """Конвейер: предмет уже закрыт — ищем его снова и ставим ордер.
+
+        result — итог OCR предмета: предмет считается готовым (item_done)
+        только после попытки ордера, при остановке посреди неё — нет.
+        """
+        self._place_deferred_order(item, qty, price)
+        if result is not None:
+            self.item_done(result)
+
+    def _place_deferred_order(self, item, qty, price):
+        try:
+            print(f"🛒 Ордер по итогам OCR: ID={item.id}, '{item.namebot}'")
+            with self.stats.span('search', item.id):
+                frame = self.search(item.namebot)
+            with self.stats.span('locate', item.id):
+                location = self.locator.locate(frame, item.image_path)
+            if location is None:
+                print(f"❌ Изображение не найдено на экране: {item.name} — ордер не выставлен")
+                return
+            with self.stats.span('open', item.id):
+                self.open_item(location)
+            with self.stats.span('order', item.id):
+                self.place_order(qty, price)
+            with self.stats.span('close', item.id):
+                self.close_item()
+        except ScanStopped:
+            raise
+        except Exception as e:
+            print(f"❌ Ошибка выставления ордера {item.id}: {e}")
+
+    def drain_orders(self):
+        if self.pipeline is None:
+            return
+        for item, qty, price, result in self.pipeline.pending_orders():
+            self.control.checkpoint()
+            self.place_deferred_order(item, qty, price, result)
+
+
+# ======================
+# Конвейер: OCR и запись в фоне
+# ======================
+class OcrPipeline:
+    """Фоновая стадия сканирования: OCR вырезок, решение и запись в БД.
+
+    Стадия интерфейса кладёт (предмет, вырезки, график) в ограниченную очередь и
+    сразу идёт к следующему поиску. Потоки пула распознают числа, пишут их
+    в БД и возвращают ордера, которые надо выставить, через очередь orders.
+    """
+
+    def __init__(self, scanner, workers=2, queue_size=4, report_every=10):
+        self.scanner = scanner
+        self.jobs = queue.Queue(maxsize=queue_size)
+        self.orders = queue.Queue()
+        self.report_every = report_every
+        self.started_at = time.monotonic()
+        self.done = 0
+        self.max_depth = 0
+        self._lock = threading.Lock()
+        self._threads = [
+            threading.Thread(target=self._work, name=f"ocr-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def submit(self, item, crops, history):
+        """Блокируется, если очередь полна, — OCR не успевает за интерфейсом."""
+        self.jobs.put((item, crops, history))
+        self.max_depth = max(self.max_depth, self.jobs.qsize())
+
+    def _work(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                self.jobs.task_done()
+                return
+            item, crops, history = job
+            try:
+                values = self.scanner.read_item(crops, history, item.id)
+                order = self.scanner.evaluate(values)
+                result = self.scanner.record(item.id, values)
+                if order:
+                    # готовым предмет станет после отложенного ордера
+                    self.orders.put((item,) + order + (result,))
+                else:
+                    self.scanner.item_done(result)
+            except Exception as e:
+                print(f"❌ Ошибка OCR/записи {item.id}: {e}")
+            finally:
+                with self._lock:
+                    self.done += 1
+                    done = self.done
+                self.jobs.task_done()
+            if self.report_every and done % self.report_every == 0:
+                self.report()
+
+    def pending_orders(self):
+        orders = []
+        while True:
+            try:
+                orders.append(self.orders.get_nowait())
+            except queue.Empty:
+                return orders
+
+    def items_per_minute(self):
+        elapsed = time.monotonic() - self.started_at
+        return self.done * 60 / elapsed if elapsed > 0 else 0.0
+
+    def report(self):
+        print(
+            f"📊 {self.items_per_minute():.1f} предм./мин · очередь OCR: {self.jobs.qsize()}"
+            f" (макс. {self.max_depth}) · ордеров ждут: {self.orders.qsize()}"
+        )
+
+    def join(self):
+        """Дожидается всех отправленных вырезок."""
+        self.jobs.join()
+
+    def close(self):
+        for _ in self._threads:
+            self.jobs.put(None)
+        for thread in self._threads:
+            thread.join()
@@ -0,0 +1,362 @@
+import atexit
+import io
+import os
+import queue
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import psycopg2
+import psycopg2.errors
+from psycopg2.extras import RealDictCursor, execute_values
+from psycopg2.pool import ThreadedConnectionPool
+
+# ======================
+# Константы
+# ======================
+# ⚠️ Подключение к БД — одно место для бота и симулятора (strategy.py).
+# Любое поле можно переопределить переменными окружения PGHOST, PGDATABASE,
+# PGUSER, PGPASSWORD, PGPORT.
+DB_CONFIG = {
+    'host': os.environ.get('PGHOST', 'localhost'),
+    'database': os.environ.get('PGDATABASE', 'postgres'),
+    'user': os.environ.get('PGUSER', 'postgres'),
+    'password': os.environ.get('PGPASSWORD', '1111'),
+    'port': int(os.environ.get('PGPORT', 5432))
+}
+POOL_MIN = 1
+POOL_MAX = 4
+
+ITEMMONEY_FIELDS = ('buy', 'sale', 'lastday', 'last2day')
+
+# Одна команда на запись: поля, переданные как None, сохраняют старое значение
+UPSERT_ITEMMONEY = """
+    INSERT INTO itemmoney (item_id, buy, sale, lastday, last2day) VALUES %s
+    ON CONFLICT (item_id) DO UPDATE SET
+        buy = COALESCE(EXCLUDED.buy, itemmoney.buy),
+        sale = COALESCE(EXCLUDED.sale, itemmoney.sale),
+        lastday = COALESCE(EXCLUDED.lastday, itemmoney.lastday),
+        last2day = COALESCE(EXCLUDED.last2day, itemmoney.last2day)
+"""
+
+# История наблюдений: каждая запись сканера — строка с временем (только добавление).
+# Партиционирование по месяцам — для миллионов строк; включать на новой таблице.
+HISTORY_ENABLED = True
+HISTORY_PARTITIONED = False
+
+HISTORY_FIELDS = ('item_id', 'observed_at') + ITEMMONEY_FIELDS
+CREATE_PRICE_HISTORY = """
+    CREATE TABLE IF NOT EXISTS price_history (
+        item_id INTEGER NOT NULL,
+        observed_at TIMESTAMPTZ NOT NULL,
+        buy INTEGER,
+        sale INTEGER,
+        lastday INTEGER,
+        last2day INTEGER
+    ){partition}
+"""
+CREATE_PRICE_HISTORY_INDEX = """
+    CREATE INDEX IF NOT EXISTS price_history_item_time ON price_history (item_id, observed_at)
+"""
+CREATE_PRICE_HISTORY_PARTITION = """
+    CREATE TABLE IF NOT EXISTS {name} PARTITION OF price_history
+    FOR VALUES FROM ('{start}') TO ('{end}')
+"""
+COPY_PRICE_HISTORY = f"COPY price_history ({', '.join(HISTORY_FIELDS)}) FROM STDIN"
+
+# itemmoney заново из истории: последнее наблюдение каждого предмета
+REBUILD_ITEMMONEY = """
+    INSERT INTO itemmoney (item_id, buy, sale, lastday, last2day)
+    SELECT DISTINCT ON (item_id) item_id, buy, sale, lastday, last2day
+    FROM price_history
+    ORDER BY item_id, observed_at DESC
+    ON CONFLICT (item_id) DO UPDATE SET
+        buy = EXCLUDED.buy,
+        sale = EXCLUDED.sale,
+        lastday = EXCLUDED.lastday,
+        last2day = EXCLUDED.last2day
+"""
+
+# Последние цены и время наблюдения (индекс (item_id, observed_at) — LIMIT 1 без сортировки)
+SELECT_LAST_OBSERVATIONS = """
+    SELECT m.item_id, m.buy, m.sale, m.lastday, m.last2day, h.observed_at
+    FROM itemmoney m
+    LEFT JOIN LATERAL (
+        SELECT observed_at FROM price_history p
+        WHERE p.item_id = m.item_id
+        ORDER BY observed_at DESC LIMIT 1
+    ) h ON TRUE
+"""
+
+# Изменчивость цены продажи за последние дни: стандартное отклонение / среднее
+SELECT_VOLATILITY = """
+    SELECT item_id, stddev_samp(sale) / NULLIF(avg(sale), 0)
+    FROM price_history
+    WHERE observed_at > now() - make_interval(days => %s) AND sale > 0
+    GROUP BY item_id
+    HAVING count(*) > 1
+"""
+
+# ======================
+# Пул соединений
+# ======================
+_pool = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    """Пул создаётся при первом обращении (DB_CONFIG можно поменять до него)."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ThreadedConnectionPool(POOL_MIN, POOL_MAX, **DB_CONFIG)
+        return _pool
+
+def close_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.closeall()
+            _pool = None
+
+atexit.register(close_pool)
+
+@contextmanager
+def get_db_connection():
+    """Соединение из пула: commit при успехе, rollback при ошибке, затем возврат в пул."""
+    pool = get_pool()
+    conn = pool.getconn()
+    broken = False
+    try:
+        yield conn
+        conn.commit()
+    except psycopg2.Error:
+        broken = conn.closed != 0
+        if not broken:
+            conn.rollback()
+        raise
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        pool.putconn(conn, close=broken)
+
+# ======================
+# PostgreSQL: чтение и запись
+# ======================
+def read_items_from_db():
+    """Возвращает список: [(id, name, namebot)]"""
+    with get_db_connection() as conn:
+        with conn.cursor(cursor_factory=RealDictCursor) as cur:
+            cur.execute("SELECT id, name, namebot FROM items ORDER BY id")
+            return [(row['id'], row['name'], row['namebot']) for row in cur.fetchall()]
+
+def read_itemmoney():
+    """Все полные строки itemmoney: [(item_id, buy, sale, lastday, last2day)]."""
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT item_id, buy, sale, lastday, last2day FROM itemmoney "
+                "WHERE buy IS NOT NULL AND sale IS NOT NULL AND lastday IS NOT NULL AND last2day IS NOT NULL"
+            )
+            return cur.fetchall()
+
+def read_last_observations():
+    """Последние цены одним запросом: {item_id: (buy, sale, lastday, last2day, observed_at)}.
+
+    observed_at — время последней записи в price_history (None, если истории нет).
+    """
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            try:
+                cur.execute(SELECT_LAST_OBSERVATIONS)
+            except psycopg2.errors.UndefinedTable:
+                conn.rollback()
+                cur.execute("SELECT item_id, buy, sale, lastday, last2day, NULL FROM itemmoney")
+            return {row[0]: row[1:] for row in cur.fetchall()}
+
+def read_volatility(days=7):
+    """Изменчивость цены продажи по истории: {item_id: коэффициент вариации}."""
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            try:
+                cur.execute(SELECT_VOLATILITY, (days,))
+            except psycopg2.errors.UndefinedTable:
+                # истории ещё нет; транзакция прервана — откатываем, а не commit в пул
+                conn.rollback()
+                return {}
+            return {item_id: float(cv) for item_id, cv in cur.fetchall() if cv is not None}
+
+def upsert_itemmoney(rows):
+    """rows: [(item_id, buy, sale, lastday, last2day)] — одной командой execute_values."""
+    if not rows:
+        return
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            execute_values(cur, UPSERT_ITEMMONEY, rows, page_size=max(100, len(rows)))
+
+def write_itemmoney(item_id, buy=None, sale=None, lastday=None, last2day=None):
+    upsert_itemmoney([(item_id, buy, sale, lastday, last2day)])
+
+# ======================
+# PostgreSQL: история цен
+# ======================
+_history_ready = False
+_partitions = set()
+
+def ensure_history_schema(cur, partitioned=HISTORY_PARTITIONED):
+    """Таблица price_history и индекс (item_id, observed_at) — один раз за запуск.
+
+    Возвращает True, если команды выполнены в этой транзакции: готовой
+    таблица считается только после commit (_mark_history_ready).
+    """
+    if _history_ready:
+        return False
+    cur.execute(CREATE_PRICE_HISTORY.format(
+        partition=" PARTITION BY RANGE (observed_at)" if partitioned else ""
+    ))
+    cur.execute(CREATE_PRICE_HISTORY_INDEX)
+    return True
+
+def ensure_partitions(cur, moments):
+    """Месячные партиции price_history под времена наблюдений пачки (UTC).
+
+    Возвращает месяцы, созданные в этой транзакции.
+    """
+    created = set()
+    for moment in moments:
+        month = (moment.year, moment.month)
+        if month in _partitions or month in created:
+            continue
+        year, number = month
+        end = (year + number // 12, number % 12 + 1)
+        # границы явно в UTC — как и время наблюдений, независимо от часового пояса сервера
+        cur.execute(CREATE_PRICE_HISTORY_PARTITION.format(
+            name=f"price_history_{year}_{number:02d}",
+            start=f"{year}-{number:02d}-01 00:00+00",
+            end=f"{end[0]}-{end[1]:02d}-01 00:00+00",
+        ))
+        created.add(month)
+    return created
+
+def _mark_history_ready(schema, months):
+    global _history_ready
+    if schema:
+        _history_ready = True
+    _partitions.update(months)
+
+def _copy_value(value):
+    if value is None:
+        return "\\N"
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+def copy_price_history(cur, observations, partitioned=HISTORY_PARTITIONED):
+    """observations: [(item_id, observed_at, buy, sale, lastday, last2day)] — одной командой COPY.
+
+    Возвращает (создана ли таблица, созданные месяцы) — отметить после commit.
+    """
+    schema = ensure_history_schema(cur, partitioned)
+    months = ensure_partitions(cur, {row[1] for row in observations}) if partitioned else set()
+    buffer = io.StringIO()
+    for row in observations:
+        buffer.write("\t".join(_copy_value(value) for value in row) + "\n")
+    buffer.seek(0)
+    cur.copy_expert(COPY_PRICE_HISTORY, buffer)
+    return schema, months
+
+def write_batch(rows, observations):
+    """Пачка сканера одной транзакцией: COPY в price_history и upsert itemmoney."""
+    created = (False, set())
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            if observations:
+                created = copy_price_history(cur, observations)
+            if rows:
+                execute_values(cur, UPSERT_ITEMMONEY, rows, page_size=max(100, len(rows)))
+    # только после commit: при откате CREATE повторится со следующей пачкой
+    _mark_history_ready(*created)
+
+def rebuild_itemmoney():
+    """Пересобирает itemmoney по последним наблюдениям из price_history."""
+    with get_db_connection() as conn:
+        with conn.cursor() as cur:
+            cur.execute(REBUILD_ITEMMONEY)
+            return cur.rowcount
+
+
+class ItemMoneyWriter:
+    """Копит записи сканера и отправляет их пачкой в фоновом потоке.
+
+    Каждая запись — наблюдение с временем: пачка уходит одним COPY в
+    price_history и одним upsert в itemmoney (последние значения) в той же
+    транзакции. Повторная запись того же предмета до отправки сливается
+    с предыдущей для itemmoney (None не затирает уже известное поле) —
+    в одной команде ON CONFLICT не может дважды обновить одну строку.
+    Сканер не ждёт базу: полная пачка отдаётся фоновому потоку.
+    """
+
+    def __init__(self, batch_size=25, history=HISTORY_ENABLED):
+        self.batch_size = batch_size
+        self.history = history
+        self._rows = {}
+        self._observations = []
+        self._lock = threading.Lock()
+        self._batches = queue.Queue()
+        self._sender = None
+
+    def add(self, item_id, buy=None, sale=None, lastday=None, last2day=None):
+        with self._lock:
+            row = dict(zip(ITEMMONEY_FIELDS, (buy, sale, lastday, last2day)))
+            if self.history:
+                self._observations.append((item_id, datetime.now(timezone.utc), buy, sale, lastday, last2day))
+            previous = self._rows.get(item_id)
+            if previous:
+                row = {k: row[k] if row[k] is not None else previous[k] for k in ITEMMONEY_FIELDS}
+            self._rows[item_id] = row
+            full = len(self._rows) >= self.batch_size
+        if full:
+            self._batches.put(self._take())
+            if self._sender is None:
+                self._sender = threading.Thread(target=self._send_batches, name="db-writer", daemon=True)
+                self._sender.start()
+
+    def _take(self):
+        with self._lock:
+            rows = [(item_id,) + tuple(row[k] for k in ITEMMONEY_FIELDS) for item_id, row in self._rows.items()]
+            observations = self._observations
+            self._rows, self._observations = {}, []
+        return rows, observations
+
+    def _send(self, rows, observations):
+        try:
+            write_batch(rows, observations)
+        except Exception:
+            # не теряем пачку: вернём в буфер всё, что не перезаписано новыми данными
+            with self._lock:
+                for item_id, *values in rows:
+                    self._rows.setdefault(item_id, dict(zip(ITEMMONEY_FIELDS, values)))
+                self._observations[:0] = observations
+            raise
+        return len(rows)
+
+    def _send_batches(self):
+        while True:
+            rows, observations = self._batches.get()
+            try:
+                self._send(rows, observations)
+            except Exception as e:
+                print(f"⚠️ Ошибка записи пачки в БД: {e} → повтор при следующей отправке")
+            finally:
+                self._batches.task_done()
+
+    def flush(self):
+        """Дожидается фоновых пачек и отправляет остаток; возвращает число строк itemmoney."""
+        self._batches.join()
+        rows, observations = self._take()
+        if not rows and not observations:
+            return 0
+        return self._send(rows, observations)
+
+    def __len__(self):
+        return len(self._rows)
@@ -0,0 +1,139 @@
+import sys
+import time
+
+import numpy as np
+
+# ======================
+# Константы
+# ======================
+# Правило ордера по умолчанию: прибыль sale/buy в пределах и продажи за 2 дня больше MIN_SOLD
+MIN_RATIO = 1.4
+MAX_RATIO = 3.0
+MIN_SOLD = 10
+# Лесенка количества: продано за 2 дня не больше границы → столько штук, иначе MAX_QTY
+QTY_LADDER = ((50, 1), (150, 2), (500, 5), (3000, 7), (10000, 10))
+MAX_QTY = 25
+
+# В itemmoney цены пишутся с поправкой на комиссии: buy × 1.025, sale × 0.935
+BUY_FEE = 1.025
+SALE_FEE = 0.935
+
+# ======================
+# Правило выставления ордера
+# ======================
+class BuyStrategy:
+    """Правило ордера с параметрами: одно и то же для сканера и симулятора.
+
+    evaluate() считает сразу по массивам (все строки itemmoney за один
+    вызов NumPy); decide() — тот же расчёт для одного предмета, поэтому
+    живой прогон и симуляция не расходятся.
+    """
+
+    def __init__(self, min_ratio=MIN_RATIO, max_ratio=MAX_RATIO, min_sold=MIN_SOLD,
+                 ladder=QTY_LADDER, max_qty=MAX_QTY, name="default"):
+        self.min_ratio = min_ratio
+        self.max_ratio = max_ratio
+        self.min_sold = min_sold
+        self.ladder = tuple(ladder)
+        self.max_qty = max_qty
+        self.name = name
+        self._bounds = np.array([bound for bound, _ in self.ladder])
+        self._quantities = np.array([qty for _, qty in self.ladder] + [max_qty])
+
+    @classmethod
+    def parse(cls, text):
+        """Параметры из строки «min_ratio=1.3,min_sold=20» (имя набора — сама строка)."""
+        params = {}
+        for part in filter(None, text.split(',')):
+            key, value = part.split('=', 1)
+            params[key.strip()] = float(value) if '.' in value else int(value)
+        return cls(name=text or "default", **params)
+
+    def quantity(self, total_sold):
+        """Количество по лесенке (работает и для массивов)."""
+        return self._quantities[np.searchsorted(self._bounds, total_sold, side='left')]
+
+    def evaluate(self, buy, sale, lastday, last2day):
+        """Массивы чисел экрана → (кол-во, цена, прибыль); кол-во 0 — ордер не ставится."""
+        buy, sale = np.asarray(buy, dtype=np.float64), np.asarray(sale, dtype=np.float64)
+        total_sold = np.asarray(lastday, dtype=np.int64) + np.asarray(last2day, dtype=np.int64)
+        ratio = np.divide(sale, buy, out=np.zeros_like(sale), where=(buy > 0) & (sale > 0))
+        passed = (buy > 0) & (total_sold > self.min_sold) & (ratio >= self.min_ratio) & (ratio <= self.max_ratio)
+        qty = np.where(passed, self.quantity(total_sold), 0)
+        # Цена ордера — цена продажи (D) + 1
+        return qty, sale.astype(np.int64) + 1, ratio
+
+    def decide(self, buy, sale, lastday, last2day):
+        """Решение по одному предмету: (кол-во, цена, прибыль) или None."""
+        qty, price, ratio = self.evaluate([buy], [sale], [lastday], [last2day])
+        if not qty[0]:
+            return None
+        return int(qty[0]), int(price[0]), float(ratio[0])
+
+    def describe(self):
+        return (
+            f"{self.name}: прибыль x{self.min_ratio:g}–x{self.max_ratio:g}, "
+            f"продано за 2 дня > {self.min_sold}"
+        )
+
+
+# ======================
+# Симуляция по сохранённым ценам
+# ======================
+def _untruncate(stored, fee):
+    """Наименьшее целое x, для которого int(x * fee) == stored (как пишет сканер)."""
+    stored = np.asarray(stored, dtype=np.float64)
+    x = np.ceil(stored / fee)
+    # ошибка округления деления: x - 1 тоже мог дать то же число
+    lower = np.maximum(x - 1, 0)
+    return np.where(np.floor(lower * fee) == stored, lower, x)
+
+def stored_to_screen(buy, sale):
+    """Цены itemmoney (с комиссиями) → числа экрана, по которым решает сканер.
+
+    Закуп восстанавливается точно (BUY_FEE > 1 — разные цены дают разные
+    int(buy × fee)). Продажа — наименьшая из цен с тем же int(sale × fee):
+    при SALE_FEE < 1 двум соседним ценам соответствует одно число, так что
+    настоящая цена может быть на 1 больше.
+    """
+    return _untruncate(buy, BUY_FEE), _untruncate(sale, SALE_FEE)
+
+def simulate(strategy, rows):
+    """rows: [(item_id, buy, sale, lastday, last2day)] из itemmoney → сводка по набору параметров."""
+    data = np.array(rows, dtype=np.float64).reshape(-1, 5)
+    buy, sale = stored_to_screen(data[:, 1], data[:, 2])
+    started = time.perf_counter()
+    qty, price, ratio = strategy.evaluate(buy, sale, data[:, 3], data[:, 4])
+    elapsed = time.perf_counter() - started
+    placed = qty > 0
+    return {
+        'name': strategy.name,
+        'items': len(data),
+        'orders': int(placed.sum()),
+        'units': int(qty.sum()),
+        'capital': int((qty * price).sum()),
+        'mean_ratio': float(ratio[placed].mean()) if placed.any() else 0.0,
+        'ms': elapsed * 1000,
+    }
+
+def compare(strategies, rows):
+    print(f"📊 Симуляция по {len(rows)} строкам itemmoney")
+    print(f"{'набор':<32} {'ордеров':>8} {'штук':>7} {'капитал':>12} {'прибыль':>8} {'мс':>7}")
+    results = []
+    for strategy in strategies:
+        result = simulate(strategy, rows)
+        results.append(result)
+        print(
+            f"{result['name'][:32]:<32} {result['orders']:>8} {result['units']:>7} "
+            f"{result['capital']:>12} x{result['mean_ratio']:>6.2f} {result['ms']:>7.2f}"
+        )
+    return results
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] in ("-h", "--help"):
+        print('Использование: python strategy.py ["min_ratio=1.3,min_sold=20" ...]')
+        print("Без аргументов — только правило по умолчанию; каждый аргумент — свой набор параметров.")
+        sys.exit(0)
+    from storage import read_itemmoney
+    compare([BuyStrategy()] + [BuyStrategy.parse(arg) for arg in sys.argv[1:]], read_itemmoney())
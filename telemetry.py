@@ -0,0 +1,161 @@
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+# ======================
+# Константы
+# ======================
+STATS_DIR = "stats"
+
+# ======================
+# Время по этапам
+# ======================
+def summarize(durations):
+    """{этап: [секунды]} → {этап: {count, p50, p95, max, total}} в миллисекундах."""
+    return {
+        stage: {
+            'count': len(values),
+            'p50': round(float(np.percentile(values, 50)) * 1000, 2),
+            'p95': round(float(np.percentile(values, 95)) * 1000, 2),
+            'max': round(max(values) * 1000, 2),
+            'total': round(sum(values) * 1000, 1),
+        }
+        for stage, values in durations.items() if values
+    }
+
+
+class RunStats:
+    """Спаны этапов сканирования одного прогона.
+
+    Каждый спан — (этап, длительность, предмет). По этапам считаются
+    p50/p95/максимум; при заданном path спаны пишутся в JSONL по мере
+    работы, в конце — строка со сводкой. Потокобезопасно: OCR и запись
+    в БД могут идти в потоках конвейера.
+    """
+
+    def __init__(self, path=None, total=0):
+        self.path = path
+        self.total = total
+        self.done = 0
+        self.started_at = time.monotonic()
+        self._durations = {}
+        self._lock = threading.Lock()
+        self._file = None
+        if path:
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            self._file = open(path, 'w', encoding='utf-8')
+
+    def record(self, stage, seconds, item_id=None):
+        with self._lock:
+            self._durations.setdefault(stage, []).append(seconds)
+            if self._file:
+                span = {
+                    't': round(time.monotonic() - self.started_at, 4),
+                    'stage': stage,
+                    'ms': round(seconds * 1000, 3),
+                    'item_id': item_id,
+                }
+                self._file.write(json.dumps(span) + "\n")
+
+    @contextmanager
+    def span(self, stage, item_id=None):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, time.perf_counter() - started, item_id)
+
+    def item_done(self):
+        with self._lock:
+            self.done += 1
+
+    def items_per_minute(self):
+        elapsed = time.monotonic() - self.started_at
+        return self.done * 60 / elapsed if elapsed > 0 and self.done else 0.0
+
+    def eta(self, done=None, total=None):
+        """Сколько секунд осталось при текущем темпе (None, если темп ещё неизвестен)."""
+        done = self.done if done is None else done
+        total = self.total if total is None else total
+        per_minute = self.items_per_minute()
+        if not per_minute:
+            return None
+        return max(0, total - done) * 60 / per_minute
+
+    def summary(self):
+        """{этап: {count, p50, p95, max, total}} в миллисекундах."""
+        with self._lock:
+            durations = {stage: list(values) for stage, values in self._durations.items()}
+        return summarize(durations)
+
+    def report(self):
+        lines = [f"⏱ Этапы ({self.done} предм., {self.items_per_minute():.1f} предм./мин):"]
+        for stage, s in sorted(self.summary().items(), key=lambda item: -item[1]['total']):
+            lines.append(
+                f"   {stage:<8} n={s['count']:<5} p50 {s['p50']:7.1f} мс  p95 {s['p95']:7.1f} мс"
+                f"  макс {s['max']:7.1f} мс  всего {s['total'] / 1000:6.1f} с"
+            )
+        return "\n".join(lines)
+
+    def close(self):
+        with self._lock:
+            file, self._file = self._file, None
+        if file:
+            file.write(json.dumps({
+                'summary': self.summary(),
+                'items': self.done,
+                'items_per_minute': round(self.items_per_minute(), 2),
+            }) + "\n")
+            file.close()
+
+
+def new_stats_path(root=STATS_DIR, suffix=""):
+    return os.path.join(root, time.strftime("%Y%m%d_%H%M%S") + suffix + ".jsonl")
+
+def format_eta(seconds):
+    if seconds is None:
+        return "—"
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+
+
+# ======================
+# Сравнение прогонов
+# ======================
+def load_summary(path):
+    """Сводка прогона из JSONL; если прогон прерван — считается по спанам."""
+    spans = {}
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            row = json.loads(line)
+            if 'summary' in row:
+                return row['summary']
+            spans.setdefault(row['stage'], []).append(row['ms'] / 1000)
+    return summarize(spans)
+
+def compare(old_path, new_path):
+    old, new = load_summary(old_path), load_summary(new_path)
+    print(f"{'этап':<8} {'p50 было':>10} {'p50 стало':>10} {'p95 было':>10} {'p95 стало':>10}")
+    for stage in sorted(set(old) | set(new)):
+        a, b = old.get(stage, {}), new.get(stage, {})
+        mark = ""
+        if a and b and b['p95'] > a['p95'] * 1.2:
+            mark = "  ⚠️ медленнее"
+        print(f"{stage:<8} {a.get('p50', '—'):>10} {b.get('p50', '—'):>10}"
+              f" {a.get('p95', '—'):>10} {b.get('p95', '—'):>10}{mark}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 2:
+        for stage, s in load_summary(sys.argv[1]).items():
+            print(f"{stage:<8} {s}")
+    elif len(sys.argv) == 3:
+        compare(sys.argv[1], sys.argv[2])
+    else:
+        print("Использование: python telemetry.py <прогон.jsonl> [<новый прогон.jsonl>]")
@@ -0,0 +1,109 @@
+import time
+
+import numpy as np
+
+from capture import to_gray
+
+# ======================
+# Константы
+# ======================
+POLL_INTERVAL = 0.02   # пауза между снимками области
+SETTLE_POLLS = 2       # столько одинаковых снимков подряд — область «успокоилась»
+TOLERANCE = 4.0        # средняя разница яркости, ниже которой снимки считаются одинаковыми
+SIGNATURE_STEP = 3     # для сравнения берётся каждый 3-й пиксель по обеим осям
+
+# ======================
+# Сравнение снимков
+# ======================
+def signature(crop, step=SIGNATURE_STEP):
+    """Уменьшенный серый отпечаток вырезки — дёшево сравнивать между опросами."""
+    return to_gray(np.asarray(crop)[::step, ::step]).astype(np.int16)
+
+def differs(a, b, tolerance=TOLERANCE):
+    if a is None or b is None or a.shape != b.shape:
+        return True
+    return float(np.abs(a - b).mean()) > tolerance
+
+
+# ======================
+# Ожидание реакции клиента
+# ======================
+class ScreenWaiter:
+    """Ожидание событий на экране вместо фиксированных пауз.
+
+    Опрашивает одну небольшую область (имя из разметки или (x, y, w, h))
+    и возвращается, как только она изменилась (и перестала меняться) или
+    просто успокоилась. По таймауту возвращает False — сканер продолжает так же, как после старой паузы.
+    Если снимок сделать не удалось, ждёт весь таймаут (запасной вариант).
+    sleep и clock подменяются при воспроизведении записи (виртуальное время).
+    """
+
+    def __init__(self, frames, sleep=time.sleep, poll=POLL_INTERVAL,
+                 settle=SETTLE_POLLS, tolerance=TOLERANCE, clock=time.monotonic):
+        self.frames = frames
+        self.sleep = sleep
+        self.clock = clock
+        self.poll = poll
+        self.settle = settle
+        self.tolerance = tolerance
+        self.events = 0
+        self.timeouts = 0
+
+    def grab(self, region):
+        if isinstance(region, str):
+            return self.frames.grab([region])
+        return self.frames.grab(rect=region)
+
+    def _grab(self, region_name):
+        frame = self.grab(region_name)
+        return frame, signature(frame.crop(region_name))
+
+    def snapshot(self, region_name):
+        """Отпечаток области до действия; None, если снять не удалось."""
+        try:
+            return self._grab(region_name)[1]
+        except Exception:
+            return None
+
+    def _wait(self, region_name, before, timeout, need_change):
+        deadline = self.clock() + timeout
+        changed = not need_change
+        last, same = None, 0
+        while True:
+            try:
+                frame, sig = self._grab(region_name)
+            except Exception as e:
+                print(f"⚠️ Не удалось снять область {region_name}: {e} → пауза {timeout:g} с")
+                self.sleep(max(0.0, deadline - self.clock()))
+                self.timeouts += 1
+                return None, False
+            if not changed:
+                changed = differs(sig, before, self.tolerance)
+            elif last is not None and not differs(sig, last, self.tolerance):
+                same += 1
+            else:
+                same = 0
+            last = sig
+            if changed and same >= self.settle:
+                self.events += 1
+                return frame, True
+            if self.clock() >= deadline:
+                self.timeouts += 1
+                return frame, False
+            self.sleep(self.poll)
+
+    def until_changed(self, region_name, before, timeout):
+        """Ждёт, пока область станет отличаться от before и успокоится.
+
+        Возвращает (последний кадр области, дождались ли события).
+        """
+        if before is None:
+            return self._wait(region_name, None, timeout, need_change=False)
+        return self._wait(region_name, before, timeout, need_change=True)
+
+    def until_stable(self, region_name, timeout):
+        """Ждёт, пока область перестанет меняться: (кадр, дождались ли)."""
+        return self._wait(region_name, None, timeout, need_change=False)
+
+    def summary(self):
+        return f"⏱ Ожидания экрана: {self.events} по событию, {self.timeouts} по таймауту"
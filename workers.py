@@ -0,0 +1,116 @@
+import threading
+from collections import namedtuple
+
+from scanner import ScanControl, Scanner
+from telemetry import RunStats
+
+# Один клиент игры: своя разметка, свой захват экрана, свой ввод и поиск иконок
+ScanClient = namedtuple('ScanClient', 'name regions frames input_backend locator')
+
+# ======================
+# Деление предметов между клиентами
+# ======================
+def split_items(items, count):
+    """Делит предметы на count частей.
+
+    Предметы с одним поисковым запросом (тиры одного предмета) попадают к
+    одному клиенту — их иконки находятся в одной выдаче. Группы раздаются
+    по очереди самому разгруженному клиенту, начиная с крупных; порядок
+    внутри части — как в исходном списке (план сканирования сохраняется).
+    """
+    groups = {}
+    for index, item in enumerate(items):
+        groups.setdefault(item.namebot, []).append((index, item))
+    shards = [[] for _ in range(max(1, count))]
+    for group in sorted(groups.values(), key=len, reverse=True):
+        min(shards, key=len).extend(group)
+    return [[item for _, item in sorted(shard, key=lambda pair: pair[0])] for shard in shards]
+
+
+# ======================
+# Несколько клиентов одновременно
+# ======================
+class ParallelScan:
+    """Один прогон на нескольких клиентах игры: по Scanner и потоку на клиента.
+
+    Каталог, OCR, правило ордера и запись в БД (ItemMoneyWriter
+    потокобезопасен) — общие; пауза и остановка (ScanControl) — тоже.
+    При shared_input все клиенты управляются одной мышью и клавиатурой:
+    ввод идёт по очереди под общим замком, а ожидания экрана, поиск иконок
+    и OCR — параллельно. Интерфейс как у Scanner (run, control, stats,
+    on_progress, on_result, on_item_done), поэтому ScanWorker работает с ним так же.
+    """
+
+    def __init__(self, clients, items, reader, writer, control=None, shared_input=True,
+                 stats_factory=None, on_progress=None, on_result=None, on_values=None, on_item_done=None,
+                 **scanner_kwargs):
+        self.clients = list(clients)
+        self.control = control or ScanControl()
+        self.on_progress = on_progress
+        self.on_result = on_result
+        self.on_values = on_values
+        self.on_item_done = on_item_done
+        self.total = len(items)
+        # общий темп и оставшееся время по всем клиентам
+        self.stats = RunStats(total=self.total)
+        self.shards = split_items(items, len(self.clients))
+        self._done = [0] * len(self.clients)
+        self._lock = threading.Lock()
+        shared_lock = threading.RLock() if shared_input else None
+
+        self.scanners = []
+        for k, (client, shard) in enumerate(zip(self.clients, self.shards)):
+            self.scanners.append(Scanner(
+                shard, client.regions, client.frames, client.locator, reader, writer,
+                control=self.control, input_backend=client.input_backend,
+                input_lock=shared_lock,
+                stats=stats_factory(client, shard) if stats_factory else None,
+                on_progress=lambda done, total, k=k: self._progress(k, done),
+                on_result=self._result, on_values=self._values, on_item_done=self._item_done,
+                **scanner_kwargs
+            ))
+
+    def _progress(self, k, done):
+        with self._lock:
+            finished = done - self._done[k]
+            self._done[k] = done
+            total_done = sum(self._done)
+        for _ in range(finished):
+            self.stats.item_done()
+        if self.on_progress:
+            self.on_progress(total_done, self.total)
+
+    def _result(self, result):
+        if self.on_result:
+            self.on_result(result)
+
+    def _values(self, item_id, values):
+        if self.on_values:
+            self.on_values(item_id, values)
+
+    def _item_done(self, result):
+        if self.on_item_done:
+            self.on_item_done(result)
+
+    def run(self, start_delay=0):
+        """Запускает всех клиентов и ждёт их; возвращает общие results."""
+        for client, shard in zip(self.clients, self.shards):
+            print(f"🖥 Клиент {client.name}: {len(shard)} предм.")
+        results = [[] for _ in self.scanners]
+
+        def work(k, scanner):
+            try:
+                results[k] = scanner.run(start_delay)
+            except Exception as e:
+                print(f"❌ Клиент {self.clients[k].name} остановился с ошибкой: {e}")
+                results[k] = scanner.results
+
+        threads = [
+            threading.Thread(target=work, args=(k, scanner), name=f"client-{self.clients[k].name}", daemon=True)
+            for k, scanner in enumerate(self.scanners)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return [result for shard_results in results for result in shard_results]